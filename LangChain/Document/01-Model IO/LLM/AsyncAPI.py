@@ -1,6 +1,8 @@
 from langchain.llms import OpenAI
 import asyncio
 
+from BatchGenerate import RateLimiter, generate_batch
+
 def generate_serially():
     llm = OpenAI(temperature=0.9)
     for _ in range(10):
@@ -17,3 +19,13 @@ async def generate_concurrently():
     llm = OpenAI(temperature=0.9)
     tasks = [async_generate(llm) for _ in range(10)]
     await asyncio.gather(*tasks)
+
+
+# 限制并发数和速率的批量生成，结果按输入顺序返回
+async def generate_batched():
+    llm = OpenAI(temperature=0.9)
+    limiter = RateLimiter(requests_per_minute=3500, tokens_per_minute=90000)
+    prompts = ("Hello, how are you?" for _ in range(100))
+    results, stats = await generate_batch(llm, prompts, concurrency=10, rate_limiter=limiter)
+    print(results[0])
+    print(stats)
@@ -0,0 +1,168 @@
+import asyncio
+import random
+import time
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+from langchain.callbacks.manager import AsyncCallbackManagerForLLMRun
+from langchain.llms.base import BaseLLM
+from langchain.llms.fake import FakeListLLM
+
+# 批量生成（BatchGenerate）
+#   AsyncAPI.py 中 generate_serially 串行执行，generate_concurrently 则用 asyncio.gather 无限制并发。
+#   面对成千上万个 prompt 时两者都不可用：前者太慢，后者会瞬间打满接口的速率限制。
+#   这里实现一个批量执行器：
+#     1. 固定数量的 worker 从 prompt 流中取任务，限制最大并发数，不需要一次性把 prompt 全部放进内存；
+#     2. 令牌桶限制每分钟请求数（RPM）和每分钟 token 数（TPM）；
+#     3. 失败后按指数退避 + 随机抖动重试；
+#     4. 结果按输入顺序返回，并统计吞吐量和 p50/p95/p99 延迟。
+
+
+# 令牌桶限流器，同时限制 RPM 和 TPM
+class RateLimiter:
+    def __init__(self, requests_per_minute: Optional[float] = None, tokens_per_minute: Optional[float] = None):
+        self.requests_per_minute = requests_per_minute
+        self.tokens_per_minute = tokens_per_minute
+        self._requests = requests_per_minute or 0.0
+        self._tokens = tokens_per_minute or 0.0
+        self._updated_at = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        elapsed = now - self._updated_at
+        self._updated_at = now
+        if self.requests_per_minute:
+            self._requests = min(self.requests_per_minute, self._requests + elapsed * self.requests_per_minute / 60)
+        if self.tokens_per_minute:
+            self._tokens = min(self.tokens_per_minute, self._tokens + elapsed * self.tokens_per_minute / 60)
+
+    async def acquire(self, tokens: int = 0) -> None:
+        # 加锁保证先到先得，避免大请求一直被小请求插队
+        async with self._lock:
+            if self.tokens_per_minute:
+                tokens = min(tokens, self.tokens_per_minute)
+            while True:
+                self._refill()
+                wait = 0.0
+                if self.requests_per_minute and self._requests < 1:
+                    wait = max(wait, (1 - self._requests) * 60 / self.requests_per_minute)
+                if self.tokens_per_minute and self._tokens < tokens:
+                    wait = max(wait, (tokens - self._tokens) * 60 / self.tokens_per_minute)
+                if wait <= 0:
+                    break
+                await asyncio.sleep(wait)
+            if self.requests_per_minute:
+                self._requests -= 1
+            if self.tokens_per_minute:
+                self._tokens -= tokens
+
+
+# 粗略估算 token 数：英文大约 4 个字符一个 token，再加上预计的输出长度
+def estimate_tokens(prompt: str, max_completion_tokens: int = 256) -> int:
+    return len(prompt) // 4 + 1 + max_completion_tokens
+
+
+def percentile(values: List[float], p: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, int(round(p / 100 * len(ordered) + 0.5)) - 1))
+    return ordered[index]
+
+
+async def generate_batch(
+    llm: BaseLLM,
+    prompts: Iterable[str],
+    concurrency: int = 8,
+    rate_limiter: Optional[RateLimiter] = None,
+    max_retries: int = 3,
+    base_backoff: float = 0.5,
+    max_backoff: float = 20.0,
+    token_estimator: Callable[[str], int] = estimate_tokens,
+) -> Tuple[List[Any], Dict[str, float]]:
+    """Run prompts through the LLM with bounded concurrency.
+
+    Returns:
+        A list with one entry per prompt in input order (the generated text, or
+        the exception raised by the last attempt) and a dict of run statistics.
+    """
+    results: Dict[int, Any] = {}
+    latencies: List[float] = []
+    counters = {"retries": 0, "failures": 0}
+    source = iter(enumerate(prompts))
+
+    async def run_one(prompt: str) -> str:
+        attempt = 0
+        while True:
+            if rate_limiter is not None:
+                await rate_limiter.acquire(token_estimator(prompt))
+            try:
+                resp = await llm.agenerate([prompt])
+                return resp.generations[0][0].text
+            except Exception:
+                if attempt >= max_retries:
+                    raise
+                # 指数退避 + 全抖动，避免所有 worker 同时重试
+                delay = random.uniform(0, min(max_backoff, base_backoff * 2 ** attempt))
+                attempt += 1
+                counters["retries"] += 1
+                await asyncio.sleep(delay)
+
+    async def worker() -> None:
+        # 所有 worker 共享同一个迭代器，同时在途的 prompt 不超过 concurrency 个
+        for index, prompt in source:
+            start = time.perf_counter()
+            try:
+                results[index] = await run_one(prompt)
+                latencies.append(time.perf_counter() - start)
+            except Exception as e:
+                results[index] = e
+                counters["failures"] += 1
+
+    start = time.perf_counter()
+    await asyncio.gather(*[worker() for _ in range(concurrency)])
+    elapsed = time.perf_counter() - start
+
+    stats = {
+        "total": len(results),
+        "succeeded": len(latencies),
+        "failures": counters["failures"],
+        "retries": counters["retries"],
+        "seconds": elapsed,
+        "throughput": len(latencies) / elapsed if elapsed else 0.0,
+        "p50": percentile(latencies, 50),
+        "p95": percentile(latencies, 95),
+        "p99": percentile(latencies, 99),
+    }
+    return [results[i] for i in range(len(results))], stats
+
+
+# 带延迟和随机失败的 FakeListLLM，用于离线压测
+class DelayedFakeLLM(FakeListLLM):
+    latency: float = 0.05  # 平均延迟（秒）
+    jitter: float = 0.02  # 延迟抖动（秒）
+    failure_rate: float = 0.0  # 随机失败的概率
+
+    @property
+    def _llm_type(self) -> str:
+        return "delayed-fake-list"
+
+    async def _acall(
+        self,
+        prompt: str,
+        stop: Optional[List[str]] = None,
+        run_manager: Optional[AsyncCallbackManagerForLLMRun] = None,
+        **kwargs: Any,
+    ) -> str:
+        await asyncio.sleep(max(0.0, random.gauss(self.latency, self.jitter)))
+        if random.random() < self.failure_rate:
+            raise RuntimeError("Injected failure")
+        return await super()._acall(prompt, stop=stop, run_manager=run_manager, **kwargs)
+
+
+if __name__ == "__main__":
+    llm = DelayedFakeLLM(responses=["I'm fine, thank you."], latency=0.05, jitter=0.02, failure_rate=0.05)
+    limiter = RateLimiter(requests_per_minute=60000, tokens_per_minute=10_000_000)
+    prompts = (f"Hello, how are you? #{i}" for i in range(1000))
+    results, stats = asyncio.run(generate_batch(llm, prompts, concurrency=50, rate_limiter=limiter, base_backoff=0.01))
+    print(len(results), stats)
@@ -2,9 +2,13 @@ import langchain
 
 from langchain.llms import OpenAI
 from langchain.cache import InMemoryCache, SQLiteCache
+from langchain.embeddings import OpenAIEmbeddings
 from langchain.text_splitter import CharacterTextSplitter
 from langchain.chains.mapreduce import MapReduceChain
 
+from TieredCache import TieredCache
+from SemanticCache import SemanticCache
+
 # text-davinci-002 速度较慢
 llm = OpenAI(model_name="text-davinci-002", n=2, best_of=2)
 
@@ -22,8 +26,31 @@ def SQLiteCacheDemo():
     print(llm.predict("Tell me a joke"))
     print(llm.predict("Tell me a joke"))
 
+# ############### Tiered Cache ################
+
+# 内存 LRU（有容量上限和 TTL） + SQLite 批量写入，并统计命中率
+def TieredCacheDemo():
+    langchain.llm_cache = TieredCache(database_path="./files/.tiered_cache.db", maxsize=256, ttl=600, batch_size=16)
+    print(llm.predict("Tell me a joke"))
+    print(llm.predict("Tell me a joke"))
+    langchain.llm_cache.flush()
+    print(langchain.llm_cache.stats)
+    # {'hits': 1, 'disk_hits': 0, 'misses': 1, 'evictions': 0, 'size': 1, 'hit_rate': 0.5}
+
+# ############### Semantic Cache ################
+
+# 按语义相似度匹配，换一种问法也能命中缓存
+def SemanticCacheDemo():
+    langchain.llm_cache = SemanticCache(OpenAIEmbeddings(), threshold=0.92, max_size=500)
+    print(llm.predict("Tell me a joke"))
+    print(llm.predict("Tell me a joke, please"))
+    print(langchain.llm_cache.last_lookup)
+    print(langchain.llm_cache.stats)
+
 
 if __name__ == "__main__":
     # InMemoryCacheDemo()
     SQLiteCacheDemo()
+    # TieredCacheDemo()
+    # SemanticCacheDemo()
     
\ No newline at end of file
@@ -0,0 +1,135 @@
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
+
+import faiss
+import numpy as np
+
+from langchain.cache import BaseCache
+from langchain.embeddings.base import Embeddings
+from langchain.schema import Generation
+
+# 语义缓存（SemanticCache）
+#   InMemoryCache / SQLiteCache 只能精确匹配 prompt 字符串，换一种说法的问题一定会请求模型。
+#   语义缓存先把 prompt 向量化，再用 FAISS 在历史 prompt 中做最近邻搜索，
+#   当余弦相似度超过阈值（threshold）时直接返回缓存的结果。
+#   每个模型配置（llm_string）有自己的索引，其它模型的条目不会挤占最近邻的名额；只需要取最近的一个条目和阈值比较。
+#   所有索引的条目总数有上限（max_size），超过后按 LRU 淘汰最久未命中的条目。
+#   未命中时暂存的向量（等 update 复用）最多保留 max_pending 个，模型调用出错、没有 update 的向量会被淘汰。
+#   每次查询都会记录耗时，并和真实模型调用的平均耗时做对比，方便评估缓存是否划算。
+
+
+class SemanticCache(BaseCache):
+    def __init__(self, embedding: Embeddings, threshold: float = 0.95, max_size: int = 1000, max_pending: int = 256):
+        self.embedding = embedding
+        self.threshold = threshold
+        self.max_size = max_size
+        self.max_pending = max_pending
+        # llm_string -> 该模型配置下的索引
+        self.indexes: Dict[str, faiss.IndexIDMap] = {}
+        # id -> (prompt, llm_string, generations)，按最近使用顺序排列
+        self.entries: "OrderedDict[int, Tuple[str, str, List[Generation]]]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.lookup_seconds = 0.0
+        self.model_seconds = 0.0
+        self.model_calls = 0
+        self.last_lookup: Dict[str, float] = {}
+        # 未命中的 prompt 暂存向量和时间，update 时复用向量并统计模型耗时
+        self._pending: "OrderedDict[Tuple[str, str], Tuple[np.ndarray, float]]" = OrderedDict()
+        self._next_id = 0
+        self._lock = threading.Lock()
+
+    def _embed(self, prompt: str) -> np.ndarray:
+        vector = np.asarray(self.embedding.embed_query(prompt), dtype="float32").reshape(1, -1)
+        # 归一化后内积即为余弦相似度
+        faiss.normalize_L2(vector)
+        return vector
+
+    def lookup(self, prompt: str, llm_string: str) -> Optional[List[Generation]]:
+        start = time.perf_counter()
+        vector = self._embed(prompt)
+        with self._lock:
+            best_score, result = -1.0, None
+            # 只在同一个模型配置的索引中查找
+            index = self.indexes.get(llm_string)
+            if index is not None and index.ntotal:
+                scores, ids = index.search(vector, 1)
+                best_score = float(scores[0][0])
+                if best_score >= self.threshold:
+                    entry_id = int(ids[0][0])
+                    result = (entry_id, self.entries[entry_id][2])
+            elapsed = time.perf_counter() - start
+            self.lookup_seconds += elapsed
+            if result is not None:
+                self.hits += 1
+                self.entries.move_to_end(result[0])
+            else:
+                self.misses += 1
+                self._pending[(prompt, llm_string)] = (vector, time.perf_counter())
+                self._pending.move_to_end((prompt, llm_string))
+                while len(self._pending) > self.max_pending:
+                    self._pending.popitem(last=False)
+            self.last_lookup = {
+                "hit": result is not None,
+                "score": best_score,
+                "seconds": elapsed,
+                "model_seconds": self.avg_model_seconds,
+                "relative_cost": elapsed / self.avg_model_seconds if self.avg_model_seconds else 0.0,
+            }
+            return result[1] if result is not None else None
+
+    def update(self, prompt: str, llm_string: str, return_val: List[Generation]) -> None:
+        with self._lock:
+            pending = self._pending.pop((prompt, llm_string), None)
+        if pending is not None:
+            vector, missed_at = pending
+            elapsed = time.perf_counter() - missed_at
+        else:
+            vector, elapsed = self._embed(prompt), None
+        with self._lock:
+            if elapsed is not None:
+                self.model_seconds += elapsed
+                self.model_calls += 1
+            index = self.indexes.get(llm_string)
+            if index is None:
+                index = self.indexes[llm_string] = faiss.IndexIDMap(faiss.IndexFlatIP(vector.shape[1]))
+            entry_id = self._next_id
+            self._next_id += 1
+            index.add_with_ids(vector, np.array([entry_id], dtype="int64"))
+            self.entries[entry_id] = (prompt, llm_string, return_val)
+            while len(self.entries) > self.max_size:
+                old_id, (_, old_llm_string, _) = self.entries.popitem(last=False)
+                old_index = self.indexes[old_llm_string]
+                old_index.remove_ids(np.array([old_id], dtype="int64"))
+                if not old_index.ntotal:
+                    del self.indexes[old_llm_string]
+                self.evictions += 1
+
+    def clear(self, **kwargs) -> None:
+        with self._lock:
+            self.indexes.clear()
+            self.entries.clear()
+            self._pending.clear()
+
+    @property
+    def avg_model_seconds(self) -> float:
+        return self.model_seconds / self.model_calls if self.model_calls else 0.0
+
+    @property
+    def stats(self) -> Dict[str, float]:
+        total = self.hits + self.misses
+        avg_lookup = self.lookup_seconds / total if total else 0.0
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "size": len(self.entries),
+            "hit_rate": self.hits / total if total else 0.0,
+            "avg_lookup_seconds": avg_lookup,
+            "avg_model_seconds": self.avg_model_seconds,
+            # 查询一次缓存相当于一次模型调用的多少
+            "lookup_to_model_ratio": avg_lookup / self.avg_model_seconds if self.avg_model_seconds else 0.0,
+        }
@@ -2,6 +2,9 @@ from langchain.llms import OpenAI
 from langchain.callbacks.streaming_stdout import StreamingStdOutCallbackHandler
 from langchain.callbacks import get_openai_callback
 
+from StreamingTokenUsage import StreamingTokenUsageCallbackHandler, process_usage
+from StreamingMetrics import StreamingMetricsCallbackHandler, streaming_metrics
+
 # 使用此方法也获取不到token_usage
 # with get_openai_callback() as cb:
 #     llm = OpenAI(streaming=True, callbacks=[StreamingStdOutCallbackHandler()], temperature=0)
@@ -14,4 +17,20 @@ llm = OpenAI(streaming=True, callbacks=[StreamingStdOutCallbackHandler()], tempe
 
 # LLMResult如果使用的话我们仍然可以访问到最后generate。但是，token_usage目前不支持流式传输。
 result = llm.generate(["Write me a song about sparkling water."])
-print(result.llm_output) # 此处输出的内容为：{'token_usage': {}, 'model_name': 'text-davinci-003'}，因为token_usage目前不支持流式传输。
\ No newline at end of file
+print(result.llm_output) # 此处输出的内容为：{'token_usage': {}, 'model_name': 'text-davinci-003'}，因为token_usage目前不支持流式传输。
+
+# 使用 StreamingTokenUsageCallbackHandler 在本地用 tiktoken 统计流式输出的 token 用量
+usage = StreamingTokenUsageCallbackHandler()
+llm = OpenAI(streaming=True, callbacks=[StreamingStdOutCallbackHandler(), usage], temperature=0)
+result = llm.generate(["Write me a song about sparkling water."])
+print(usage) # 输出格式与 get_openai_callback 相同：Tokens Used / Prompt Tokens / Completion Tokens / Successful Requests / Total Cost (USD)
+print(process_usage) # 当前进程内所有流式调用的汇总
+
+
+# 使用 StreamingMetricsCallbackHandler 记录首 token 延迟、token 间隔、每秒 token 数和总耗时
+metrics = StreamingMetricsCallbackHandler(slow_ttft=2.0)
+llm = OpenAI(streaming=True, callbacks=[StreamingStdOutCallbackHandler(), metrics], temperature=0)
+result = llm.generate(["Write me a song about sparkling water."])
+print(metrics.last_run) # {'tokens': ..., 'total_seconds': ..., 'ttft_seconds': ..., 'tokens_per_second': ...}
+print(streaming_metrics.to_json())
+print(streaming_metrics.to_prometheus())
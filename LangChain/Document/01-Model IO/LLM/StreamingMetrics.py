@@ -0,0 +1,137 @@
+import bisect
+import json
+import threading
+import time
+from typing import Any, Dict, List, Optional, Sequence
+from uuid import UUID
+
+from langchain.callbacks.base import BaseCallbackHandler
+from langchain.schema import LLMResult
+
+# 流式输出的延迟指标
+#   StreamingStdOutCallbackHandler 只负责打印 token，这里额外记录每次运行的：
+#     首 token 延迟（time to first token）、token 间隔（inter-token latency）、每秒 token 数、总耗时。
+#   指标保存在进程内的直方图中，可以导出为 JSON 或 Prometheus 文本格式，不依赖任何外部监控组件。
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+RATE_BUCKETS = (1, 5, 10, 20, 40, 60, 80, 100, 150, 200, 500)
+
+
+# 累积直方图，与 Prometheus histogram 的语义一致
+class Histogram:
+    def __init__(self, name: str, description: str, buckets: Sequence[float] = LATENCY_BUCKETS):
+        self.name = name
+        self.description = description
+        self.buckets = tuple(sorted(buckets))
+        self.counts = [0] * (len(self.buckets) + 1)  # 最后一个是 +Inf
+        self.sum = 0.0
+        self.count = 0
+        self._lock = threading.Lock()
+
+    def observe(self, value: float) -> None:
+        with self._lock:
+            self.counts[bisect.bisect_left(self.buckets, value)] += 1
+            self.sum += value
+            self.count += 1
+
+    def quantile(self, q: float) -> float:
+        # 按桶的上界近似计算分位数
+        if not self.count:
+            return 0.0
+        target, seen = q * self.count, 0
+        for bound, n in zip(self.buckets + (float("inf"),), self.counts):
+            seen += n
+            if seen >= target:
+                return bound
+        return float("inf")
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "count": self.count,
+            "sum": self.sum,
+            "avg": self.sum / self.count if self.count else 0.0,
+            "p50": self.quantile(0.5),
+            "p95": self.quantile(0.95),
+            "p99": self.quantile(0.99),
+            "buckets": {str(b): n for b, n in zip(self.buckets + ("+Inf",), self.counts)},
+        }
+
+    def to_prometheus(self) -> str:
+        lines = [f"# HELP {self.name} {self.description}", f"# TYPE {self.name} histogram"]
+        cumulative = 0
+        for bound, n in zip(self.buckets, self.counts):
+            cumulative += n
+            lines.append(f'{self.name}_bucket{{le="{bound}"}} {cumulative}')
+        lines.append(f'{self.name}_bucket{{le="+Inf"}} {self.count}')
+        lines.append(f"{self.name}_sum {self.sum}")
+        lines.append(f"{self.name}_count {self.count}")
+        return "\n".join(lines)
+
+
+class StreamingMetrics:
+    def __init__(self):
+        self.ttft = Histogram("llm_time_to_first_token_seconds", "Time from request start to the first streamed token.")
+        self.inter_token = Histogram("llm_inter_token_seconds", "Gap between two consecutive streamed tokens.")
+        self.tokens_per_second = Histogram("llm_tokens_per_second", "Streamed tokens per second for one run.", RATE_BUCKETS)
+        self.total = Histogram("llm_stream_total_seconds", "Wall time of one streamed run.")
+
+    @property
+    def histograms(self) -> List[Histogram]:
+        return [self.ttft, self.inter_token, self.tokens_per_second, self.total]
+
+    def to_json(self) -> str:
+        return json.dumps({h.name: h.to_dict() for h in self.histograms}, indent=2)
+
+    def to_prometheus(self) -> str:
+        return "\n".join(h.to_prometheus() for h in self.histograms) + "\n"
+
+
+# 进程级别的指标，默认所有 StreamingMetricsCallbackHandler 都写到这里
+streaming_metrics = StreamingMetrics()
+
+
+class StreamingMetricsCallbackHandler(BaseCallbackHandler):
+    """Callback Handler that records latency metrics of streamed runs."""
+
+    def __init__(self, metrics: Optional[StreamingMetrics] = None, slow_ttft: Optional[float] = None):
+        self.metrics = metrics or streaming_metrics
+        self.slow_ttft = slow_ttft  # 首 token 延迟超过该值时打印告警
+        # run_id -> {"start", "first_token", "last_token", "tokens"}
+        self._runs: Dict[UUID, Dict[str, Any]] = {}
+        self.last_run: Dict[str, float] = {}
+
+    def on_llm_start(self, serialized: Dict[str, Any], prompts: List[str], *, run_id: UUID, **kwargs: Any) -> None:
+        self._runs[run_id] = {"start": time.perf_counter(), "first_token": None, "last_token": None, "tokens": 0}
+
+    def on_llm_new_token(self, token: str, *, run_id: UUID, **kwargs: Any) -> None:
+        run = self._runs.get(run_id)
+        if run is None:
+            return
+        now = time.perf_counter()
+        if run["first_token"] is None:
+            run["first_token"] = now
+            ttft = now - run["start"]
+            self.metrics.ttft.observe(ttft)
+            if self.slow_ttft is not None and ttft > self.slow_ttft:
+                print(f"\n[StreamingMetrics] slow first token: {ttft:.3f}s (run {run_id})")
+        else:
+            self.metrics.inter_token.observe(now - run["last_token"])
+        run["last_token"] = now
+        run["tokens"] += 1
+
+    def on_llm_end(self, response: LLMResult, *, run_id: UUID, **kwargs: Any) -> None:
+        run = self._runs.pop(run_id, None)
+        if run is None:
+            return
+        total = time.perf_counter() - run["start"]
+        self.metrics.total.observe(total)
+        self.last_run = {"tokens": run["tokens"], "total_seconds": total}
+        if run["first_token"] is not None:
+            # 每秒 token 数从第一个 token 开始计算，不包含排队和首 token 等待时间
+            stream_seconds = run["last_token"] - run["first_token"]
+            tps = (run["tokens"] - 1) / stream_seconds if stream_seconds > 0 else float(run["tokens"])
+            self.metrics.tokens_per_second.observe(tps)
+            self.last_run.update({"ttft_seconds": run["first_token"] - run["start"], "tokens_per_second": tps})
+
+    def on_llm_error(self, error: BaseException, *, run_id: UUID, **kwargs: Any) -> None:
+        self._runs.pop(run_id, None)
@@ -0,0 +1,135 @@
+import threading
+from functools import lru_cache
+from typing import Any, Dict, List, Optional
+from uuid import UUID
+
+import tiktoken
+
+from langchain.callbacks.base import BaseCallbackHandler
+from langchain.callbacks.openai_info import MODEL_COST_PER_1K_TOKENS, get_openai_token_cost_for_model, standardize_model_name
+from langchain.schema import LLMResult
+
+# 流式模式下的 token 统计
+#   streaming=True 时 OpenAI 不返回 token_usage，get_openai_callback 统计到的数量一直是 0（见 Streaming.py）。
+#   这个回调在本地用 tiktoken 计数：on_llm_start 时统计 prompt 的 token 数，on_llm_new_token 每收到一个分片就累加 completion 的 token 数。
+#   统计结果按每次运行（run_id）和整个进程两个维度汇总，字段和费用计算方式都与 get_openai_callback 保持一致。
+#   运行结束（on_llm_end / on_llm_error）后不再保留该运行的状态；出错的运行同样计入已经消耗的 prompt 和已收到的 completion，
+#   但不计入 successful_requests。
+
+
+@lru_cache(maxsize=None)
+def get_encoding(model_name: str) -> tiktoken.Encoding:
+    try:
+        return tiktoken.encoding_for_model(model_name)
+    except KeyError:
+        return tiktoken.get_encoding("cl100k_base")
+
+
+class TokenUsage:
+    def __init__(self):
+        self.total_tokens = 0
+        self.prompt_tokens = 0
+        self.completion_tokens = 0
+        self.successful_requests = 0
+        self.total_cost = 0.0
+        self._lock = threading.Lock()
+
+    def add(self, model_name: str, prompt_tokens: int, completion_tokens: int, successful: bool = True) -> None:
+        model_name = standardize_model_name(model_name)
+        cost = 0.0
+        if model_name in MODEL_COST_PER_1K_TOKENS:
+            cost = get_openai_token_cost_for_model(model_name, prompt_tokens) + get_openai_token_cost_for_model(model_name, completion_tokens, is_completion=True)
+        with self._lock:
+            self.prompt_tokens += prompt_tokens
+            self.completion_tokens += completion_tokens
+            self.total_tokens += prompt_tokens + completion_tokens
+            self.successful_requests += int(successful)
+            self.total_cost += cost
+
+    def __repr__(self) -> str:
+        return (
+            f"Tokens Used: {self.total_tokens}\n"
+            f"\tPrompt Tokens: {self.prompt_tokens}\n"
+            f"\tCompletion Tokens: {self.completion_tokens}\n"
+            f"Successful Requests: {self.successful_requests}\n"
+            f"Total Cost (USD): ${self.total_cost}"
+        )
+
+
+# 进程级别的汇总，所有 StreamingTokenUsageCallbackHandler 共享
+process_usage = TokenUsage()
+
+
+class StreamingTokenUsageCallbackHandler(BaseCallbackHandler, TokenUsage):
+    """Callback Handler that counts tokens locally, also in streaming mode."""
+
+    def __init__(self, default_model_name: str = "text-davinci-003"):
+        TokenUsage.__init__(self)
+        self.default_model_name = default_model_name
+        # 进行中的运行：run_id -> {"model_name", "prompt_tokens", "completion_tokens", "streamed"}
+        self.runs: Dict[UUID, Dict[str, Any]] = {}
+        # 最近一次结束的运行
+        self.last_run: Optional[Dict[str, Any]] = None
+
+    @property
+    def always_verbose(self) -> bool:
+        return True
+
+    def on_llm_start(self, serialized: Dict[str, Any], prompts: List[str], *, run_id: UUID, **kwargs: Any) -> None:
+        params = kwargs.get("invocation_params") or {}
+        model_name = params.get("model_name") or params.get("model") or self.default_model_name
+        encoding = get_encoding(model_name)
+        self.runs[run_id] = {
+            "model_name": model_name,
+            "prompt_tokens": sum(len(encoding.encode(p)) for p in prompts),
+            "completion_tokens": 0,
+            "streamed": False,
+        }
+
+    def on_llm_new_token(self, token: str, *, run_id: UUID, **kwargs: Any) -> None:
+        run = self.runs.get(run_id)
+        if run is None:
+            return
+        # OpenAI 流式返回时每个分片通常就是一个 token，这里仍按实际编码长度累加
+        run["completion_tokens"] += len(get_encoding(run["model_name"]).encode(token))
+        run["streamed"] = True
+
+    def _record(self, run: Dict[str, Any], successful: bool) -> None:
+        self.add(run["model_name"], run["prompt_tokens"], run["completion_tokens"], successful)
+        process_usage.add(run["model_name"], run["prompt_tokens"], run["completion_tokens"], successful)
+        self.last_run = run
+
+    def on_llm_end(self, response: LLMResult, *, run_id: UUID, **kwargs: Any) -> None:
+        run = self.runs.pop(run_id, None)
+        if run is None:
+            return
+        llm_output = response.llm_output
+        token_usage = (llm_output or {}).get("token_usage") or {}
+        if token_usage:
+            # 非流式模式下接口已经返回了准确的用量，直接使用
+            run["prompt_tokens"] = token_usage.get("prompt_tokens", 0)
+            run["completion_tokens"] = token_usage.get("completion_tokens", 0)
+        elif not run["streamed"] and llm_output is not None and "token_usage" in llm_output:
+            # 一次 generate 有多个 prompt 时，LLMResult.flatten 只把整批的用量交给第一个运行，其余运行的 token_usage 为空，
+            # 它们的用量已经计入第一个运行
+            run["prompt_tokens"] = run["completion_tokens"] = 0
+        elif not run["streamed"]:
+            encoding = get_encoding(run["model_name"])
+            run["completion_tokens"] = sum(len(encoding.encode(g.text)) for gens in response.generations for g in gens)
+        self._record(run, successful=True)
+
+    def on_llm_error(self, error: BaseException, *, run_id: UUID, **kwargs: Any) -> None:
+        run = self.runs.pop(run_id, None)
+        if run is not None:
+            # prompt 已经计费，流式中断前收到的 completion 也已经生成
+            self._record(run, successful=False)
+
+    # 进行中的运行的用量，结束后见 last_run
+    def run_usage(self, run_id: UUID) -> Optional[Dict[str, Any]]:
+        return self.runs.get(run_id)
+
+    def __copy__(self) -> "StreamingTokenUsageCallbackHandler":
+        return self
+
+    def __deepcopy__(self, memo: Any) -> "StreamingTokenUsageCallbackHandler":
+        return self
@@ -0,0 +1,193 @@
+import atexit
+import json
+import math
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from langchain.cache import BaseCache
+from langchain.schema import Generation
+
+# 两级缓存（TieredCache）
+#   InMemoryCache 没有容量上限，压测时内存会一直增长；SQLiteCache 每次未命中都要加一次写锁。
+#   这里把两者组合起来：
+#     第一级：进程内的 LRU 缓存，容量有上限，每个条目都有 TTL（过期时间）。
+#     第二级：SQLite 持久化存储，未命中后写入的结果先进入缓冲区，攒够一批再一次性写入。
+#   TTL 对两级都有效：SQLite 中的每一行记录过期时间（时间戳），过期的行不会再被读出或回填到内存。
+#   缓冲区中还没写入的结果在 flush / close、退出 with 语句或进程退出（atexit）时写入。
+#   用法与 langchain 自带的缓存一样：langchain.llm_cache = TieredCache(...)
+
+
+def _dumps(generations: Sequence[Generation]) -> str:
+    return json.dumps([{"text": g.text, "generation_info": g.generation_info} for g in generations], ensure_ascii=False)
+
+
+def _loads(value: str) -> List[Generation]:
+    return [Generation(**g) for g in json.loads(value)]
+
+
+# 第一级：带 TTL 的 LRU 缓存
+class LRUCache:
+    def __init__(self, maxsize: int = 1024, ttl: Optional[float] = 3600):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.evictions = 0
+        self._data: "OrderedDict[Tuple[str, str], Tuple[float, List[Generation]]]" = OrderedDict()
+
+    def get(self, key: Tuple[str, str]) -> Optional[List[Generation]]:
+        item = self._data.get(key)
+        if item is None:
+            return None
+        expires_at, value = item
+        if expires_at < time.monotonic():
+            # 条目过期，直接丢弃
+            del self._data[key]
+            self.evictions += 1
+            return None
+        self._data.move_to_end(key)
+        return value
+
+    # ttl 为 None 时使用默认的 TTL，例如从磁盘回填时传入剩余的有效时间
+    def put(self, key: Tuple[str, str], value: List[Generation], ttl: Optional[float] = None) -> None:
+        ttl = self.ttl if ttl is None else ttl
+        expires_at = time.monotonic() + ttl if ttl is not None else float("inf")
+        self._data[key] = (expires_at, value)
+        self._data.move_to_end(key)
+        while len(self._data) > self.maxsize:
+            # 淘汰最久未使用的条目
+            self._data.popitem(last=False)
+            self.evictions += 1
+
+    def clear(self) -> None:
+        self._data.clear()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+
+# 第二级：批量写入的 SQLite 存储
+#   expires_at 是过期时间的 Unix 时间戳（进程重启后仍然有效），NULL 表示永不过期。
+class SQLiteStore:
+    def __init__(self, database_path: str = "./files/.tiered_cache.db", batch_size: int = 32, ttl: Optional[float] = None):
+        self.batch_size = batch_size
+        self.ttl = ttl
+        self._pending: Dict[Tuple[str, str], Tuple[str, Optional[float]]] = {}
+        self._conn = sqlite3.connect(database_path, check_same_thread=False)
+        self._conn.execute("CREATE TABLE IF NOT EXISTS llm_cache (prompt TEXT, llm TEXT, response TEXT, expires_at REAL, PRIMARY KEY (prompt, llm))")
+        # 旧版本创建的表没有 expires_at 列
+        if "expires_at" not in [row[1] for row in self._conn.execute("PRAGMA table_info(llm_cache)")]:
+            self._conn.execute("ALTER TABLE llm_cache ADD COLUMN expires_at REAL")
+        self._conn.commit()
+
+    # 返回缓存的结果和剩余的有效秒数（永不过期时为 math.inf），不存在或已过期时返回 None
+    def get(self, key: Tuple[str, str]) -> Optional[Tuple[List[Generation], float]]:
+        if key in self._pending:
+            response, expires_at = self._pending[key]
+        else:
+            row = self._conn.execute("SELECT response, expires_at FROM llm_cache WHERE prompt = ? AND llm = ?", key).fetchone()
+            if row is None:
+                return None
+            response, expires_at = row
+        remaining = expires_at - time.time() if expires_at is not None else math.inf
+        if remaining <= 0:
+            return None
+        return _loads(response), remaining
+
+    def put(self, key: Tuple[str, str], value: List[Generation]) -> None:
+        self._pending[key] = (_dumps(value), time.time() + self.ttl if self.ttl is not None else None)
+        if len(self._pending) >= self.batch_size:
+            self.flush()
+
+    def flush(self) -> None:
+        if not self._pending:
+            return
+        rows = [(prompt, llm, response, expires_at) for (prompt, llm), (response, expires_at) in self._pending.items()]
+        # 一个事务内写入整批数据，只加一次写锁；顺便清理已经过期的行
+        with self._conn:
+            self._conn.executemany("INSERT OR REPLACE INTO llm_cache (prompt, llm, response, expires_at) VALUES (?, ?, ?, ?)", rows)
+            self._conn.execute("DELETE FROM llm_cache WHERE expires_at < ?", (time.time(),))
+        self._pending.clear()
+
+    def clear(self) -> None:
+        self._pending.clear()
+        with self._conn:
+            self._conn.execute("DELETE FROM llm_cache")
+
+    def close(self) -> None:
+        self.flush()
+        self._conn.close()
+
+
+# 两级缓存，实现 BaseCache 接口，可以直接赋值给 langchain.llm_cache
+class TieredCache(BaseCache):
+    def __init__(self, database_path: str = "./files/.tiered_cache.db", maxsize: int = 1024, ttl: Optional[float] = 3600, batch_size: int = 32):
+        self.memory = LRUCache(maxsize=maxsize, ttl=ttl)
+        self.store = SQLiteStore(database_path=database_path, batch_size=batch_size, ttl=ttl)
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._closed = False
+        # 进程退出时写入缓冲区中剩余的结果
+        atexit.register(self.close)
+
+    def lookup(self, prompt: str, llm_string: str) -> Optional[List[Generation]]:
+        key = (prompt, llm_string)
+        with self._lock:
+            value = self.memory.get(key)
+            if value is not None:
+                self.hits += 1
+                return value
+            found = self.store.get(key)
+            if found is not None:
+                # 磁盘命中后回填到内存，只保留剩余的有效时间
+                value, remaining = found
+                self.hits += 1
+                self.disk_hits += 1
+                self.memory.put(key, value, ttl=remaining if remaining != math.inf else None)
+                return value
+            self.misses += 1
+            return None
+
+    def update(self, prompt: str, llm_string: str, return_val: List[Generation]) -> None:
+        key = (prompt, llm_string)
+        with self._lock:
+            self.memory.put(key, return_val)
+            self.store.put(key, return_val)
+
+    def clear(self, **kwargs) -> None:
+        with self._lock:
+            self.memory.clear()
+            self.store.clear()
+
+    def flush(self) -> None:
+        with self._lock:
+            self.store.flush()
+
+    def close(self) -> None:
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+            self.store.close()
+        atexit.unregister(self.close)
+
+    def __enter__(self) -> "TieredCache":
+        return self
+
+    def __exit__(self, *exc_info: object) -> None:
+        self.close()
+
+    @property
+    def stats(self) -> Dict[str, float]:
+        total = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "evictions": self.memory.evictions,
+            "size": len(self.memory),
+            "hit_rate": self.hits / total if total else 0.0,
+        }
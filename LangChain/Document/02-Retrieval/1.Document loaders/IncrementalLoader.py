@@ -0,0 +1,137 @@
+import hashlib
+import json
+import os
+from concurrent.futures import FIRST_COMPLETED, Future, ProcessPoolExecutor, ThreadPoolExecutor, wait
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Type
+
+from langchain.document_loaders import BSHTMLLoader, CSVLoader, PyPDFLoader, TextLoader, UnstructuredMarkdownLoader
+from langchain.document_loaders.base import BaseLoader
+from langchain.schema import Document
+
+# 增量目录加载器（IncrementalDirectoryLoader）
+#   DirectoryLoader 每次运行都会重新加载目录下的全部文件，即使开启了 use_multithreading。
+#   这里维护一份清单（manifest），记录每个文件的路径、修改时间、大小和内容哈希：
+#     1. 修改时间和大小都没变的文件直接跳过，不需要读取内容；
+#     2. 修改时间变了但内容哈希没变的文件（例如 touch 过）也跳过；
+#     3. 只有新增或内容变化的文件才会交给加载器，Document 以迭代器的形式逐个返回；
+#     4. PDF / Unstructured 这类 CPU 密集的加载器放到进程池执行，其余的放到线程池执行。
+
+DEFAULT_LOADERS: Dict[str, Type[BaseLoader]] = {
+    ".pdf": PyPDFLoader,
+    ".html": BSHTMLLoader,
+    ".md": UnstructuredMarkdownLoader,
+    ".csv": CSVLoader,
+    ".txt": TextLoader,
+    ".json": TextLoader,
+}
+
+# 需要在进程池中执行的加载器
+CPU_HEAVY_LOADERS = (PyPDFLoader, UnstructuredMarkdownLoader)
+
+
+def file_hash(path: str, chunk_size: int = 1 << 20) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+# 进程池中执行的函数必须定义在模块顶层，才能被 pickle
+def _load_file(path: str, loader_cls: Type[BaseLoader], loader_kwargs: Dict[str, Any]) -> List[Document]:
+    return loader_cls(path, **loader_kwargs).load()
+
+
+class IncrementalDirectoryLoader(BaseLoader):
+    def __init__(
+        self,
+        path: str,
+        glob: str = "**/*",
+        manifest_path: Optional[str] = None,
+        loaders: Optional[Dict[str, Type[BaseLoader]]] = None,
+        loader_kwargs: Optional[Dict[Type[BaseLoader], Dict[str, Any]]] = None,
+        max_workers: Optional[int] = None,
+        silent_errors: bool = False,
+    ):
+        self.path = Path(path)
+        self.glob = glob
+        self.manifest_path = Path(manifest_path) if manifest_path else self.path / ".manifest.json"
+        self.loaders = loaders or DEFAULT_LOADERS
+        self.loader_kwargs = loader_kwargs or {}
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self.silent_errors = silent_errors
+        self.manifest: Dict[str, Dict[str, Any]] = self._read_manifest()
+        self.deleted: List[str] = []
+        self.skipped = 0
+
+    def _read_manifest(self) -> Dict[str, Dict[str, Any]]:
+        if self.manifest_path.exists():
+            return json.loads(self.manifest_path.read_text())
+        return {}
+
+    def _write_manifest(self) -> None:
+        tmp = self.manifest_path.with_suffix(".tmp")
+        tmp.write_text(json.dumps(self.manifest, indent=2, ensure_ascii=False))
+        # 先写临时文件再替换，避免中断时留下损坏的清单
+        os.replace(tmp, self.manifest_path)
+
+    # 找出新增或变化的文件，返回 {路径: 新的清单条目}
+    def changed_files(self) -> Dict[str, Dict[str, Any]]:
+        changed: Dict[str, Dict[str, Any]] = {}
+        seen = set()
+        for p in sorted(self.path.glob(self.glob)):
+            if not p.is_file() or p.suffix.lower() not in self.loaders or p.name.startswith("."):
+                continue
+            key = str(p)
+            seen.add(key)
+            stat = p.stat()
+            entry = self.manifest.get(key)
+            if entry and entry["mtime"] == stat.st_mtime and entry["size"] == stat.st_size:
+                self.skipped += 1
+                continue
+            digest = file_hash(key)
+            if entry and entry["hash"] == digest:
+                # 只是修改时间变了，更新清单即可
+                entry.update(mtime=stat.st_mtime, size=stat.st_size)
+                self.skipped += 1
+                continue
+            changed[key] = {"mtime": stat.st_mtime, "size": stat.st_size, "hash": digest}
+        self.deleted = [key for key in self.manifest if key not in seen]
+        for key in self.deleted:
+            del self.manifest[key]
+        return changed
+
+    def lazy_load(self) -> Iterator[Document]:
+        changed = self.changed_files()
+        if not changed:
+            self._write_manifest()
+            return
+        with ProcessPoolExecutor(max_workers=self.max_workers) as processes, ThreadPoolExecutor(max_workers=self.max_workers) as threads:
+            pending: Dict[Future, str] = {}
+            for key in changed:
+                loader_cls = self.loaders[Path(key).suffix.lower()]
+                pool = processes if issubclass(loader_cls, CPU_HEAVY_LOADERS) else threads
+                pending[pool.submit(_load_file, key, loader_cls, self.loader_kwargs.get(loader_cls, {}))] = key
+            try:
+                while pending:
+                    done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        key = pending.pop(future)
+                        try:
+                            docs = future.result()
+                        except Exception as e:
+                            if not self.silent_errors:
+                                raise
+                            print(f"Error loading {key}: {e}")
+                            continue
+                        yield from docs
+                        # 只有文档已经全部交给调用方后才写入清单
+                        self.manifest[key] = changed[key]
+            finally:
+                for future in pending:
+                    future.cancel()
+                self._write_manifest()
+
+    def load(self) -> List[Document]:
+        return list(self.lazy_load())
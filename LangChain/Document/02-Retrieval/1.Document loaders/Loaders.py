@@ -6,9 +6,16 @@ from langchain.vectorstores import FAISS, Chroma
 from langchain.embeddings.openai import OpenAIEmbeddings
 
 import json
+import sys
 from pathlib import Path
 from pprint import pprint
 
+from IncrementalLoader import IncrementalDirectoryLoader
+from StreamingLoader import StreamingCSVLoader, StreamingJSONLoader
+from ParallelPDFLoader import ParallelPDFLoader
+from MmapTextLoader import MmapTextLoader, split_windows
+from langchain.text_splitter import RecursiveCharacterTextSplitter
+
 baseDir = "./files/"
 
 # TextLoader
@@ -19,6 +26,15 @@ def TextLoaderDemo():
     print(document)
 
 
+# MmapTextLoader
+# 使用 mmap 按固定大小的窗口读取大文件，窗口落在合法的字符边界上，并且可以直接交给文本分割器流式切分。
+def MmapTextLoaderDemo():
+    loader = MmapTextLoader(file_path=baseDir + "index.md", autodetect_encoding=True, window_size=64 * 1024)
+    text_splitter = RecursiveCharacterTextSplitter(chunk_size=100, chunk_overlap=20)
+    for chunk in split_windows(loader.lazy_load(), text_splitter):
+        print(chunk)
+
+
 # CSVLoader
 # CSV加载器将CSV文件读入为文档。它将每一行作为一个示例，并将每一列作为一个变量。
 def CSVLoaderDemo():
@@ -46,6 +62,17 @@ def CSVLoaderDemo():
         # Document(page_content='name: Diana\nage: 28\ncity: Chicago', metadata={'source': './files/index.csv', 'row': 3}), 
         # Document(page_content='name: Eva\nage: 35\ncity: Boston', metadata={'source': './files/index.csv', 'row': 4})
     # ]
+
+
+# StreamingCSVLoader
+# 逐行读取CSV文件，按批返回文档，内存占用与文件大小无关。
+def StreamingCSVLoaderDemo():
+    loader = StreamingCSVLoader(file_path=baseDir + "index.csv", batch_size=2)
+    for batch in loader.lazy_load_batches():
+        print(len(batch), batch[0].metadata)
+    # 2 {'source': './files/index.csv', 'row': 0}
+    # 2 {'source': './files/index.csv', 'row': 2}
+    # 1 {'source': './files/index.csv', 'row': 4}
     
     
 # DirectoryLoader
@@ -64,6 +91,19 @@ def DirectoryLoaderDemo():
     docs = loader.load()
 
 
+# IncrementalDirectoryLoader
+# 增量加载目录：通过清单（路径、修改时间、大小、内容哈希）只加载新增或变化的文件，并以流的方式返回文档。
+def IncrementalDirectoryLoaderDemo():
+    loader = IncrementalDirectoryLoader(baseDir, glob="**/*", manifest_path=baseDir + ".manifest.json", silent_errors=True)
+    for doc in loader.lazy_load():
+        print(doc.metadata)
+    print("skipped:", loader.skipped, "deleted:", loader.deleted)
+
+    # 第二次运行时文件都没有变化，不会加载任何文档
+    loader = IncrementalDirectoryLoader(baseDir, glob="**/*", manifest_path=baseDir + ".manifest.json")
+    print(len(loader.load()), "skipped:", loader.skipped)
+
+
 # UnstructuredHTMLLoader
 # 该加载器将HTML文件读入为文档。它将每个文件作为一个示例，并将文件名作为变量。
 def UnstructuredHTMLLoaderDemo():
@@ -102,6 +142,26 @@ def JSONLoaderDemo():
     pprint(document)
 
 
+# StreamingJSONLoader
+# 按 jq_schema 增量解析JSON（或逐行解析JSONL），不需要先把整个文件读入内存。
+def StreamingJSONLoaderDemo():
+    def metadata_func(record: dict, metadata: dict) -> dict:
+        metadata["server_name"] = record.get("server_name")
+        metadata["status"] = record.get("status")
+        metadata["resource_path"] = record.get("resource_path")
+        return metadata
+
+    loader = StreamingJSONLoader(
+        file_path=baseDir + "index.json",
+        jq_schema='.data.rows[]',
+        content_key="server_name",
+        metadata_func=metadata_func,
+        batch_size=100
+    )
+    for batch in loader.lazy_load_batches():
+        pprint(batch)
+
+
 # UnstructuredMarkdownLoader
 # 该加载器将Markdown文件读入为文档。它将每个文件作为一个示例，并将文件名作为变量。
 def UnstructuredMarkdownLoaderDemo():
@@ -179,6 +239,28 @@ def PythonLoaderDemo():
         pages = loader.load()
         print(pages)
 
+    # 10. ParallelPDFLoader
+    # 按页码范围切分，多进程并行提取文本；backend="auto" 自动选择已安装的最快后端，"fastest" 则先实测再选择。
+    # 各后端的每秒页数和峰值内存可以运行 python ParallelPDFLoader.py 查看。
+    def ParallelPDFLoaderDemo():
+        loader = ParallelPDFLoader(baseDir + "index.pdf", backend="auto", max_workers=4)
+        print(loader.backend)
+        pages = loader.load()
+        print(len(pages), pages[0].metadata)
+
+    # 11. 流式建索引
+    # 逐页加载、分批嵌入并写入 Chroma，内存占用与 PDF 大小无关；中断后重新运行会跳过已写入的页。
+    def StreamingIndexDemo():
+        sys.path.append(str(Path(__file__).resolve().parent.parent / "4.Vector stores"))
+        from IndexBuilder import StreamingIndexBuilder
+
+        builder = StreamingIndexBuilder(OpenAIEmbeddings(), persist_directory=baseDir + "chroma_index", store="chroma", batch_size=64)
+        chroma_index = builder.build(PyPDFLoader(baseDir + "index.pdf").lazy_load())
+        print(builder.stats)
+        docs = chroma_index.similarity_search("介绍一下LLMSingleActionAgent?", k=2)
+        for doc in docs:
+            print(str(doc.metadata["page"]) + ":", doc.page_content[:], '\n')
+
 
     # 执行模块
     # PyPDFLoaderDemo()
@@ -190,15 +272,21 @@ def PythonLoaderDemo():
     # PyMuPDFLoaderDemo()
     # PyPDFDirectoryLoaderDemo()
     PDFPlumberLoaderDemo()
+    # ParallelPDFLoaderDemo()
+    # StreamingIndexDemo()
 
 
 
 
 if __name__ == "__main__":
     # TextLoaderDemo()
+    # MmapTextLoaderDemo()
     # CSVLoaderDemo()
+    # StreamingCSVLoaderDemo()
     # DirectoryLoaderDemo()
+    # IncrementalDirectoryLoaderDemo()
     # UnstructuredHTMLLoaderDemo()
     # JSONLoaderDemo()
+    # StreamingJSONLoaderDemo()
     # UnstructuredMarkdownLoaderDemo()
     PythonLoaderDemo()
\ No newline at end of file
@@ -0,0 +1,121 @@
+import codecs
+import mmap
+import os
+from typing import Iterator, List, Optional
+
+from langchain.document_loaders.base import BaseLoader
+from langchain.schema import Document
+from langchain.text_splitter import TextSplitter
+
+# 内存映射的文本加载器（MmapTextLoader）
+#   TextLoader 会把整个文件读成一个 Document，后面的 TextSplitter 再复制一遍字符串，内存中同时存在两份完整文本。
+#   这里用 mmap 映射文件，按固定字节数切成窗口，用增量解码器解码：多字节字符被窗口截断时，
+#   剩余字节会留到下一个窗口，保证每个窗口都落在合法的字符边界上（对 UTF-8、GBK 等编码都适用）。
+#   autodetect_encoding=True 时只取文件开头的一段样本检测编码，不会读取整个文件。
+#   split_windows() 把窗口直接交给 TextSplitter，超大的日志或导出文件也可以边读边切分。
+
+
+def detect_encodings(sample: bytes) -> List[str]:
+    try:
+        import chardet
+    except ImportError:
+        raise ImportError("chardet package not found, please install it with `pip install chardet`")
+    result = chardet.detect(sample)
+    return [result["encoding"]] if result.get("encoding") else []
+
+
+class MmapTextLoader(BaseLoader):
+    def __init__(self, file_path: str, encoding: Optional[str] = None, autodetect_encoding: bool = False, window_size: int = 1 << 20, sample_size: int = 64 << 10):
+        self.file_path = file_path
+        self.encoding = encoding
+        self.autodetect_encoding = autodetect_encoding
+        self.window_size = window_size
+        self.sample_size = sample_size
+
+    def _windows(self, encoding: str) -> Iterator[Document]:
+        size = os.path.getsize(self.file_path)
+        if size == 0:
+            return
+        decoder = codecs.getincrementaldecoder(encoding)(errors="strict")
+        char_offset = 0
+        with open(self.file_path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            for byte_offset in range(0, size, self.window_size):
+                end = min(byte_offset + self.window_size, size)
+                text = decoder.decode(mm[byte_offset:end], final=end == size)
+                if not text:
+                    continue
+                yield Document(page_content=text, metadata={"source": self.file_path, "start_index": char_offset, "byte_offset": byte_offset})
+                char_offset += len(text)
+
+    # 自动检测编码时，用文件开头的样本依次验证候选编码，选出第一个能正确解码的
+    def _select_encoding(self) -> str:
+        default = self.encoding or "utf-8"
+        if not self.autodetect_encoding:
+            return default
+        with open(self.file_path, "rb") as f:
+            sample = f.read(self.sample_size)
+        for encoding in [default] + detect_encodings(sample):
+            try:
+                codecs.getincrementaldecoder(encoding)(errors="strict").decode(sample, final=False)
+                return encoding
+            except (UnicodeDecodeError, LookupError):
+                continue
+        raise RuntimeError(f"Error loading {self.file_path}: could not detect encoding")
+
+    def lazy_load(self) -> Iterator[Document]:
+        try:
+            yield from self._windows(self._select_encoding())
+        except UnicodeDecodeError as e:
+            raise RuntimeError(f"Error loading {self.file_path}") from e
+
+    def load(self) -> List[Document]:
+        return list(self.lazy_load())
+
+
+# 按窗口流式切分：每个窗口切分后保留最后一块在原文中的剩余部分（未经 strip，窗口边界处的空白不会丢失），
+# 与下一个窗口拼接后再切分，避免在窗口边界处产生截断的块。
+# 块在拼接文本中的位置用 find 从上一块的末尾（减去重叠部分）开始查找，加上窗口的 start_index 得到在整个文件中的位置。
+def _chunk_starts(text: str, chunks: List[str], overlap: int) -> List[Optional[int]]:
+    starts: List[Optional[int]] = []
+    offset = 0
+    for chunk in chunks:
+        found = text.find(chunk, offset)
+        starts.append(found if found != -1 else None)
+        if found != -1:
+            offset = max(found + 1, found + len(chunk) - overlap)
+    return starts
+
+
+def split_windows(windows: Iterator[Document], splitter: TextSplitter) -> Iterator[Document]:
+    carry = ""
+    carry_start: Optional[int] = None
+    source = None
+
+    def document(chunk: str, start: Optional[int]) -> Document:
+        metadata = {"source": source}
+        if start is not None:
+            metadata["start_index"] = start
+        return Document(page_content=chunk, metadata=metadata)
+
+    for window in windows:
+        source = window.metadata.get("source")
+        text = carry + window.page_content
+        # 拼接文本在文件中的起始位置
+        base = carry_start if carry else window.metadata.get("start_index")
+        chunks = splitter.split_text(text)
+        if not chunks:
+            carry, carry_start = text, base
+            continue
+        positions = _chunk_starts(text, chunks, splitter._chunk_overlap)
+        for chunk, position in zip(chunks[:-1], positions[:-1]):
+            yield document(chunk, base + position if base is not None and position is not None else None)
+        last = positions[-1]
+        if last is None:
+            # 找不到时退回到切分后的块
+            carry, carry_start = chunks[-1], None
+        else:
+            carry, carry_start = text[last:], base + last if base is not None else None
+    if carry:
+        chunks = splitter.split_text(carry)
+        for chunk, position in zip(chunks, _chunk_starts(carry, chunks, splitter._chunk_overlap)):
+            yield document(chunk, carry_start + position if carry_start is not None and position is not None else None)
@@ -0,0 +1,233 @@
+import importlib.util
+import multiprocessing
+import os
+import queue
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+from langchain.document_loaders.base import BaseLoader
+from langchain.schema import Document
+
+# 按页并行的 PDF 加载器（ParallelPDFLoader）
+#   PythonLoaderDemo 列出了 PyPDF、PyPDFium2、PyMuPDF、PDFPlumber 等多种 PDF 后端，但没有说明该用哪一个。
+#   这个加载器把文档按页码范围切分，交给多个工作进程并行提取文本，每页返回一个 Document（metadata 与 PyPDFLoader 一致）。
+#   backend="auto" 时按经验速度优先级选择已安装的后端；backend="fastest" 时先用前几页实测各个后端再选最快的；也可以手动指定。
+#   UnstructuredPDFLoader / MathpixPDFLoader / OnlinePDFLoader 不支持按页读取，不在这里的后端列表中。
+#   运行本文件会对 ./files/index.pdf 以及由它复制生成的更大 PDF 做基准测试，输出每个后端的每秒页数和峰值内存
+#   （单个进程的峰值中最大的一个，不是所有工作进程的总和）。
+
+# 按经验速度从快到慢排列：(后端名称, 需要的模块)
+BACKEND_PRIORITY = [("pymupdf", "fitz"), ("pypdfium2", "pypdfium2"), ("pypdf", "pypdf"), ("pdfplumber", "pdfplumber")]
+
+
+def _count_pymupdf(path: str) -> int:
+    import fitz
+    with fitz.open(path) as doc:
+        return doc.page_count
+
+
+def _extract_pymupdf(path: str, start: int, end: int) -> List[Tuple[int, str]]:
+    import fitz
+    with fitz.open(path) as doc:
+        return [(i, doc[i].get_text()) for i in range(start, end)]
+
+
+def _count_pypdfium2(path: str) -> int:
+    import pypdfium2
+    pdf = pypdfium2.PdfDocument(path)
+    try:
+        return len(pdf)
+    finally:
+        pdf.close()
+
+
+def _extract_pypdfium2(path: str, start: int, end: int) -> List[Tuple[int, str]]:
+    import pypdfium2
+    pdf = pypdfium2.PdfDocument(path)
+    try:
+        return [(i, pdf[i].get_textpage().get_text_range()) for i in range(start, end)]
+    finally:
+        pdf.close()
+
+
+def _count_pypdf(path: str) -> int:
+    import pypdf
+    return len(pypdf.PdfReader(path).pages)
+
+
+def _extract_pypdf(path: str, start: int, end: int) -> List[Tuple[int, str]]:
+    import pypdf
+    reader = pypdf.PdfReader(path)
+    return [(i, reader.pages[i].extract_text()) for i in range(start, end)]
+
+
+def _count_pdfplumber(path: str) -> int:
+    import pdfplumber
+    with pdfplumber.open(path) as pdf:
+        return len(pdf.pages)
+
+
+def _extract_pdfplumber(path: str, start: int, end: int) -> List[Tuple[int, str]]:
+    import pdfplumber
+    with pdfplumber.open(path) as pdf:
+        return [(i, pdf.pages[i].extract_text() or "") for i in range(start, end)]
+
+
+BACKENDS: Dict[str, Tuple[Callable[[str], int], Callable[[str, int, int], List[Tuple[int, str]]]]] = {
+    "pymupdf": (_count_pymupdf, _extract_pymupdf),
+    "pypdfium2": (_count_pypdfium2, _extract_pypdfium2),
+    "pypdf": (_count_pypdf, _extract_pypdf),
+    "pdfplumber": (_count_pdfplumber, _extract_pdfplumber),
+}
+
+
+def installed_backends() -> List[str]:
+    return [name for name, module in BACKEND_PRIORITY if importlib.util.find_spec(module) is not None]
+
+
+def select_backend(backend: str = "auto") -> str:
+    available = installed_backends()
+    if backend == "auto":
+        if not available:
+            raise ImportError("No PDF backend found, please install one of: pymupdf, pypdfium2, pypdf, pdfplumber")
+        return available[0]
+    if backend not in BACKENDS:
+        raise ValueError(f"Unknown PDF backend `{backend}`, expected one of {list(BACKENDS)}")
+    if backend not in available:
+        raise ImportError(f"PDF backend `{backend}` is not installed")
+    return backend
+
+
+# 用前几页实测每个已安装的后端，返回最快的一个
+def fastest_backend(path: str, sample_pages: int = 2) -> str:
+    timings = {}
+    for backend in installed_backends():
+        count, extract = BACKENDS[backend]
+        start = time.perf_counter()
+        extract(path, 0, min(sample_pages, count(path)))
+        timings[backend] = time.perf_counter() - start
+    if not timings:
+        raise ImportError("No PDF backend found, please install one of: pymupdf, pypdfium2, pypdf, pdfplumber")
+    return min(timings, key=timings.get)
+
+
+# 进程池中执行的函数必须定义在模块顶层
+def _extract_range(backend: str, path: str, start: int, end: int) -> List[Tuple[int, str]]:
+    return BACKENDS[backend][1](path, start, end)
+
+
+class ParallelPDFLoader(BaseLoader):
+    def __init__(self, file_path: str, backend: str = "auto", max_workers: Optional[int] = None, pages_per_task: int = 16):
+        self.file_path = file_path
+        self.backend = fastest_backend(file_path) if backend == "fastest" else select_backend(backend)
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self.pages_per_task = pages_per_task
+
+    def page_ranges(self) -> List[Tuple[int, int]]:
+        total = BACKENDS[self.backend][0](self.file_path)
+        # 页数较少时缩小每个任务的页数，让所有进程都有活干
+        size = max(1, min(self.pages_per_task, -(-total // self.max_workers)))
+        return [(start, min(start + size, total)) for start in range(0, total, size)]
+
+    def lazy_load(self) -> Iterator[Document]:
+        ranges = self.page_ranges()
+        if len(ranges) <= 1 or self.max_workers == 1:
+            results = (_extract_range(self.backend, self.file_path, start, end) for start, end in ranges)
+            for pages in results:
+                for page, text in pages:
+                    yield Document(page_content=text, metadata={"source": self.file_path, "page": page})
+            return
+        with ProcessPoolExecutor(max_workers=self.max_workers) as executor:
+            futures = [executor.submit(_extract_range, self.backend, self.file_path, start, end) for start, end in ranges]
+            # 按页码顺序返回
+            for future in futures:
+                for page, text in future.result():
+                    yield Document(page_content=text, metadata={"source": self.file_path, "page": page})
+
+    def load(self) -> List[Document]:
+        return list(self.lazy_load())
+
+
+# ################ Benchmark ################
+
+# 把源 PDF 的页面重复多次，生成一个更大的 PDF
+def generate_large_pdf(source: str, target: str, copies: int) -> str:
+    import pypdf
+    reader = pypdf.PdfReader(source)
+    writer = pypdf.PdfWriter()
+    for _ in range(copies):
+        for page in reader.pages:
+            writer.add_page(page)
+    with open(target, "wb") as f:
+        writer.write(f)
+    return target
+
+
+# 主进程和已结束的子进程中，单个进程峰值 RSS 的最大值（KiB）；不是各进程之和
+def _max_process_peak_rss_kib() -> Optional[int]:
+    try:
+        import resource
+    except ImportError:
+        # Windows 没有 resource 模块，有 psutil 时只统计当前进程
+        try:
+            import psutil
+        except ImportError:
+            return None
+        return getattr(psutil.Process().memory_info(), "peak_wset", 0) // 1024 or None
+    # Linux 下 ru_maxrss 的单位是 KiB，macOS 下是字节
+    scale = 1024 if sys.platform == "darwin" else 1
+    self_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss // scale
+    children_rss = resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss // scale
+    return max(self_rss, children_rss)
+
+
+def _benchmark_worker(path: str, backend: str, max_workers: int, results_queue) -> None:
+    start = time.perf_counter()
+    pages = sum(1 for _ in ParallelPDFLoader(path, backend=backend, max_workers=max_workers).lazy_load())
+    results_queue.put((pages, time.perf_counter() - start, _max_process_peak_rss_kib()))
+
+
+# 每个后端在单独的进程中运行，峰值内存互不干扰；工作进程崩溃或超过 timeout 秒时记录错误，继续测试下一个后端
+def benchmark(path: str, backends: Optional[List[str]] = None, max_workers: Optional[int] = None, timeout: float = 600.0) -> Dict[str, Dict[str, Any]]:
+    ctx = multiprocessing.get_context("spawn")
+    results: Dict[str, Dict[str, Any]] = {}
+    for backend in backends or installed_backends():
+        results_queue = ctx.Queue()
+        process = ctx.Process(target=_benchmark_worker, args=(path, backend, max_workers or os.cpu_count() or 1, results_queue))
+        process.start()
+        deadline = time.monotonic() + timeout
+        result = None
+        while result is None:
+            alive = process.is_alive()
+            try:
+                result = results_queue.get(timeout=1.0)
+            except queue.Empty:
+                # 进程已经退出（结果在退出前写入时上面已经读到）或超时
+                if not alive or time.monotonic() >= deadline:
+                    break
+        if result is None:
+            process.terminate()
+            process.join()
+            results[backend] = {"error": f"worker exited with code {process.exitcode}" if not alive else f"timed out after {timeout} seconds"}
+            continue
+        process.join()
+        pages, seconds, peak_rss = result
+        results[backend] = {
+            "pages": pages,
+            "seconds": seconds,
+            "pages_per_second": pages / seconds if seconds else 0.0,
+            "max_process_peak_rss_mib": peak_rss / 1024 if peak_rss is not None else None,
+        }
+    return results
+
+
+if __name__ == "__main__":
+    baseDir = "./files/"
+    print("index.pdf", benchmark(baseDir + "index.pdf"))
+    large = generate_large_pdf(baseDir + "index.pdf", baseDir + "index-large.pdf", copies=50)
+    try:
+        print("index-large.pdf", benchmark(large))
+    finally:
+        os.remove(large)
@@ -0,0 +1,190 @@
+import copy
+import logging
+import re
+import time
+from bisect import bisect_left, bisect_right
+from collections import deque
+from typing import Deque, Dict, List, Optional, Tuple
+
+from langchain.schema import Document
+from langchain.text_splitter import RecursiveCharacterTextSplitter
+
+logger = logging.getLogger(__name__)
+
+# 线性时间的递归字符分割器（LinearRecursiveCharacterTextSplitter）
+#   RecursiveCharacterTextSplitter 每一层递归都会用 re.split 生成新的子字符串，合并时反复拼接、测量长度，
+#   current_doc[1:] 每弹出一块就复制一次列表；add_start_index=True 时还要对每个块调用一次 str.find 查找起始位置。
+#   这里的实现只在原文上记录 (start, end) 区间：
+#     1. 每种分隔符只在全文上扫描一次，递归时用二分查找取出区间内的分隔符位置，不复制子字符串；
+#     2. 合并时用双端队列和累计长度，弹出旧块是 O(1)；
+#     3. 每个块只在最终输出时切片一次，起始位置由区间直接算出，不再调用 str.find；
+#     4. 创建 Document 时跳过 pydantic 校验。
+#   走快速路径时，输出的块与 RecursiveCharacterTextSplitter 完全相同（由 __main__ 中的随机对比校验，包括自定义分隔符）。
+#   start_index 是块在原文中的真实位置；原实现用 str.find 查找，遇到重复文本时可能得到更早出现的位置。
+#   只有 length_function=len、keep_separator=True、分隔符不是正则、（除第一个外）都是单个字符并且最后一个是 "" 时走快速路径（默认配置满足），
+#   其余情况回退到原实现。
+
+Span = Tuple[int, int]
+
+
+class LinearRecursiveCharacterTextSplitter(RecursiveCharacterTextSplitter):
+    def _fast_path(self) -> bool:
+        # 全文扫描得到的位置互不重叠，只有除第一个以外的分隔符都是单个字符时，才与在子串上重新扫描的结果一致
+        # 最后一个分隔符不是 "" 时，原实现在没有分隔符可用时把整段作为一块，这里不处理这种情况
+        return (
+            self._length_function is len
+            and self._keep_separator
+            and not self._is_separator_regex
+            and bool(self._separators)
+            and self._separators[-1] == ""
+            and all(len(s) <= 1 for s in self._separators[1:])
+        )
+
+    # 每种分隔符只在全文上扫描一次，记录所有出现位置；递归时用二分查找取出区间内的位置
+    # cache 是每次调用 split_text 时新建的局部字典，同一个分割器可以在多个线程中使用
+    def _positions(self, text: str, separator: str, cache: Dict[str, List[int]]) -> List[int]:
+        positions = cache.get(separator)
+        if positions is None:
+            positions = [m.start() for m in re.finditer(re.escape(separator), text)]
+            cache[separator] = positions
+        return positions
+
+    def _split_spans(self, text: str, start: int, end: int, separators: List[str], cache: Dict[str, List[int]]) -> List[Tuple[str, int]]:
+        # 选择第一个在区间内出现的分隔符，与原实现的选择规则一致
+        bounds, new_separators = None, []
+        for i, s in enumerate(separators):
+            if s == "":
+                break
+            positions = self._positions(text, s, cache)
+            lo = bisect_left(positions, start)
+            # 分隔符必须完整地落在区间内
+            hi = bisect_right(positions, end - len(s))
+            if lo < hi:
+                bounds, new_separators = [start] + positions[lo:hi] + [end], separators[i + 1:]
+                break
+
+        # 保留分隔符时，每一段都从分隔符开始，相邻两个位置之间就是一段
+        if bounds is None:
+            splits = [(i, i + 1) for i in range(start, end)]
+        else:
+            splits = [(a, b) for a, b in zip(bounds, bounds[1:]) if a < b]
+
+        final_chunks: List[Tuple[str, int]] = []
+        good_splits: List[Span] = []
+        for a, b in splits:
+            if b - a < self._chunk_size:
+                good_splits.append((a, b))
+                continue
+            if good_splits:
+                final_chunks.extend(self._merge_spans(text, good_splits))
+                good_splits = []
+            if not new_separators:
+                # 与原实现相同，原样加入，不去除空白
+                final_chunks.append((text[a:b], a))
+            else:
+                final_chunks.extend(self._split_spans(text, a, b, new_separators, cache))
+        if good_splits:
+            final_chunks.extend(self._merge_spans(text, good_splits))
+        return final_chunks
+
+    def _emit(self, text: str, start: int, end: int) -> List[Tuple[str, int]]:
+        chunk = text[start:end]
+        if self._strip_whitespace:
+            stripped = chunk.lstrip()
+            start += len(chunk) - len(stripped)
+            chunk = stripped.rstrip()
+        return [(chunk, start)] if chunk else []
+
+    def _merge_spans(self, text: str, splits: List[Span]) -> List[Tuple[str, int]]:
+        # 分隔符已保留在各段开头，相邻区间首尾相接，合并就是取第一段的起点和最后一段的终点
+        docs: List[Tuple[str, int]] = []
+        current: Deque[Span] = deque()
+        total = 0
+        for a, b in splits:
+            length = b - a
+            if total + length > self._chunk_size:
+                if total > self._chunk_size:
+                    logger.warning(f"Created a chunk of size {total}, which is longer than the specified {self._chunk_size}")
+                if current:
+                    docs.extend(self._emit(text, current[0][0], current[-1][1]))
+                    while total > self._chunk_overlap or (total + length > self._chunk_size and total > 0):
+                        first = current.popleft()
+                        total -= first[1] - first[0]
+            current.append((a, b))
+            total += length
+        if current:
+            docs.extend(self._emit(text, current[0][0], current[-1][1]))
+        return docs
+
+    def split_text_with_offsets(self, text: str) -> List[Tuple[str, int]]:
+        if not self._fast_path():
+            chunks, index = [], -1
+            for chunk in super().split_text(text):
+                index = text.find(chunk, index + 1)
+                chunks.append((chunk, index))
+            return chunks
+        return self._split_spans(text, 0, len(text), self._separators, {})
+
+    def split_text(self, text: str) -> List[str]:
+        return [chunk for chunk, _ in self.split_text_with_offsets(text)]
+
+    def create_documents(self, texts: List[str], metadatas: Optional[List[dict]] = None) -> List[Document]:
+        _metadatas = metadatas or [{}] * len(texts)
+        documents = []
+        for i, text in enumerate(texts):
+            for chunk, start in self.split_text_with_offsets(text):
+                metadata = copy.deepcopy(_metadatas[i]) if _metadatas[i] else {}
+                if self._add_start_index:
+                    metadata["start_index"] = start
+                # 字段类型已经确定，跳过 pydantic 校验
+                documents.append(Document.construct(page_content=chunk, metadata=metadata))
+        return documents
+
+
+# ################ Benchmark ################
+
+def generate_text(size: int) -> str:
+    paragraph = (
+        "LangChain is a framework for developing applications powered by language models.\n"
+        "It enables applications that are context-aware and can reason about how to answer.\n"
+        "加载文档后，您通常会想要对其进行转换以更好地适合您的应用程序。最简单的例子是，您可能希望将长文档分割成更小的块。\n\n"
+    )
+    return (paragraph * (size // len(paragraph) + 1))[:size]
+
+
+def benchmark(size: int = 4 * 1024 * 1024, chunk_size: int = 100, chunk_overlap: int = 20) -> None:
+    text = generate_text(size)
+    kwargs = dict(chunk_size=chunk_size, chunk_overlap=chunk_overlap, length_function=len, add_start_index=True)
+    results = {}
+    for name, cls in [("RecursiveCharacterTextSplitter", RecursiveCharacterTextSplitter), ("LinearRecursiveCharacterTextSplitter", LinearRecursiveCharacterTextSplitter)]:
+        start = time.perf_counter()
+        docs = cls(**kwargs).create_documents([text])
+        seconds = time.perf_counter() - start
+        results[name] = docs
+        print(f"{name}: {len(docs)} chunks in {seconds:.2f}s, {len(docs) / seconds:,.0f} chunks/s")
+    baseline, fast = results.values()
+    assert [d.page_content for d in baseline] == [d.page_content for d in fast], "chunks differ"
+    print("same chunks:", True, "same start_index:", [d.metadata for d in baseline] == [d.metadata for d in fast])
+
+
+def check_equivalence(cases: int = 4000, seed: int = 0) -> None:
+    """Compare the chunks with RecursiveCharacterTextSplitter on random texts, sizes and separator lists."""
+    import random
+
+    rng = random.Random(seed)
+    separator_lists = [["\n\n", "\n", " ", ""], ["\n\n", "\n"], ["\n", " "], ["\n", ""], ["。", ""], [" "], [""], ["\n\n", "。", " ", ""]]
+    alphabet = "ab 。\n"
+    mismatches = 0
+    for _ in range(cases):
+        text = "".join(rng.choice(alphabet) for _ in range(rng.randint(0, 200)))
+        chunk_size = rng.randint(1, 40)
+        kwargs = dict(chunk_size=chunk_size, chunk_overlap=rng.randint(0, chunk_size - 1), separators=rng.choice(separator_lists))
+        if LinearRecursiveCharacterTextSplitter(**kwargs).split_text(text) != RecursiveCharacterTextSplitter(**kwargs).split_text(text):
+            mismatches += 1
+    print(f"{cases} random cases, {mismatches} mismatches")
+    assert mismatches == 0, "chunks differ"
+
+
+if __name__ == "__main__":
+    check_equivalence()
+    benchmark()
@@ -0,0 +1,117 @@
+import os
+import re
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Dict, Iterable, Iterator, List, Optional
+
+from langchain.schema import Document
+from langchain.text_splitter import NLTKTextSplitter, SpacyTextSplitter, TextSplitter
+
+# 多进程句子分割（ParallelSentenceSplitter）
+#   SpacyTextSplitter / NLTKTextSplitter 在单核上运行完整的 NLP 管线，并且每创建一个 SpacyTextSplitter 就重新加载一次 spaCy 模型。
+#   这里用进程池并行分割：
+#     1. 每个工作进程启动时（initializer）创建一次分割器，模型常驻在进程中，之后的调用不再重新加载；
+#     2. 多个文档直接分发到各个进程；单个超长文本先按段落切成若干大段再分发；
+#     3. 用 executor.map 按输入顺序流式返回结果。
+#   注意：超长文本按段落切段后，跨越段边界的句子不会被合并到同一个块中。
+
+_worker_splitter: Optional[TextSplitter] = None
+
+
+def _init_worker(kind: str, kwargs: Dict[str, Any]) -> None:
+    global _worker_splitter
+    if kind == "spacy":
+        _worker_splitter = SpacyTextSplitter(**kwargs)
+    elif kind == "nltk":
+        _worker_splitter = NLTKTextSplitter(**kwargs)
+    else:
+        raise ValueError(f"Unknown splitter `{kind}`, expected `spacy` or `nltk`")
+    # 预热：第一次调用时 spaCy / NLTK 还会加载一些惰性资源
+    _worker_splitter.split_text("Warm up. The pipeline is ready.")
+
+
+def _split_in_worker(text: str) -> List[str]:
+    return _worker_splitter.split_text(text)
+
+
+# 按段落把超长文本切成不超过 segment_size 个字符的大段
+def segment_text(text: str, segment_size: int) -> List[str]:
+    if len(text) <= segment_size:
+        return [text]
+    segments, start = [], 0
+    bounds = [m.end() for m in re.finditer(r"\n\s*\n", text)] + [len(text)]
+    last = 0
+    for end in bounds:
+        if end - start > segment_size and last > start:
+            segments.append(text[start:last])
+            start = last
+        last = end
+    segments.append(text[start:])
+    return [s for s in segments if s.strip()]
+
+
+class ParallelSentenceSplitter:
+    def __init__(self, kind: str = "spacy", processes: Optional[int] = None, segment_size: int = 100_000, **splitter_kwargs: Any):
+        self.kind = kind
+        self.processes = processes or os.cpu_count() or 1
+        self.segment_size = segment_size
+        self.splitter_kwargs = splitter_kwargs
+        self._executor: Optional[ProcessPoolExecutor] = None
+
+    # 进程池只创建一次，之后的所有调用复用已经加载好模型的工作进程
+    @property
+    def executor(self) -> ProcessPoolExecutor:
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(max_workers=self.processes, initializer=_init_worker, initargs=(self.kind, self.splitter_kwargs))
+        return self._executor
+
+    def split_texts(self, texts: Iterable[str]) -> Iterator[List[str]]:
+        """Split many texts in parallel, yielding the chunks of each text in input order."""
+        texts = list(texts)
+        segments = [segment_text(text, self.segment_size) for text in texts]
+        flat = [s for segs in segments for s in segs]
+        results = self.executor.map(_split_in_worker, flat, chunksize=max(1, len(flat) // (self.processes * 4)))
+        for segs in segments:
+            chunks: List[str] = []
+            for _ in segs:
+                chunks.extend(next(results))
+            yield chunks
+
+    def split_text(self, text: str) -> List[str]:
+        return next(self.split_texts([text]))
+
+    def split_documents(self, documents: Iterable[Document]) -> Iterator[Document]:
+        documents = list(documents)
+        for doc, chunks in zip(documents, self.split_texts(d.page_content for d in documents)):
+            for chunk in chunks:
+                yield Document(page_content=chunk, metadata=dict(doc.metadata))
+
+    def close(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown()
+            self._executor = None
+
+    def __enter__(self) -> "ParallelSentenceSplitter":
+        return self
+
+    def __exit__(self, *args: Any) -> None:
+        self.close()
+
+
+if __name__ == "__main__":
+    from langchain.document_loaders import PyPDFLoader
+
+    pages = PyPDFLoader("./files/index.pdf").load()
+    texts = [p.page_content for p in pages] * 50
+
+    start = time.perf_counter()
+    splitter = NLTKTextSplitter(chunk_size=1000, chunk_overlap=0)
+    baseline = [splitter.split_text(t) for t in texts]
+    print(f"NLTKTextSplitter (1 process): {time.perf_counter() - start:.2f}s")
+
+    for processes in (1, 2, 4, os.cpu_count() or 1):
+        with ParallelSentenceSplitter(kind="nltk", processes=processes, chunk_size=1000, chunk_overlap=0) as parallel:
+            parallel.split_text("Start the workers.")
+            start = time.perf_counter()
+            result = list(parallel.split_texts(texts))
+            print(f"ParallelSentenceSplitter ({processes} processes): {time.perf_counter() - start:.2f}s, same output: {result == baseline}")
@@ -2,6 +2,10 @@ from langchain.text_splitter import RecursiveCharacterTextSplitter, CharacterTex
 from langchain.text_splitter import NLTKTextSplitter
 from langchain.document_loaders import UnstructuredPDFLoader
 
+from FastTextSplitter import LinearRecursiveCharacterTextSplitter
+from TokenBudgetSplitter import TokenBudgetTextSplitter
+from ParallelSentenceSplitter import ParallelSentenceSplitter
+
 baseDir = "./files/"
 
 # 加载文档后，您通常会想要对其进行转换以更好地适合您的应用程序。
@@ -24,6 +28,22 @@ def RecursiveCharacterTextSplitterDemo():
     texts = text_splitter.create_documents([content])
     print(texts[0])
     print(len(texts))
+
+
+# 使用LinearRecursiveCharacterTextSplitter
+# 与RecursiveCharacterTextSplitter的输出相同，但分隔符只扫描一次、合并时用累计长度，start_index直接由区间算出。
+# 运行 python FastTextSplitter.py 可以查看在几MB文本上的每秒块数对比。
+def LinearRecursiveCharacterTextSplitterDemo():
+    text_splitter = LinearRecursiveCharacterTextSplitter(
+        chunk_size = 100,
+        chunk_overlap  = 20,
+        length_function = len,
+        add_start_index = True
+    )
+
+    texts = text_splitter.create_documents([content])
+    print(texts[0])
+    print(len(texts))
  
    
 # 使用CharacterTextSplitter
@@ -48,6 +68,20 @@ def TokenTextSplitterDemo():
     print(len(texts))
 
 
+# 使用TokenBudgetTextSplitter
+# 整篇文档只编码一次，按token下标切块后映射回字符区间；编码器在所有实例间共享。
+# separator="\n\n" 时与 CharacterTextSplitter.from_tiktoken_encoder 的用法相同，不指定时与 TokenTextSplitter 相同。
+def TokenBudgetTextSplitterDemo():
+    text_splitter = TokenBudgetTextSplitter(
+        separator = "\n\n",
+        chunk_size = 100,
+        chunk_overlap = 0
+    )
+    texts = text_splitter.split_text(content)
+    print(texts)
+    print(len(texts))
+
+
 # 使用SpacyTextSplitter
 # 按字符数 (character count) 分割文本
 def SpacyTextSplitterDemo():
@@ -83,12 +117,25 @@ def NLTKTextSplitterDemo():
     print(len(texts))
 
 
+# 使用ParallelSentenceSplitter
+# 在进程池中并行运行 SpacyTextSplitter / NLTKTextSplitter，每个进程只加载一次模型，结果按输入顺序返回。
+# 运行 python ParallelSentenceSplitter.py 可以查看不同进程数下的耗时。
+def ParallelSentenceSplitterDemo():
+    with ParallelSentenceSplitter(kind="spacy", processes=4, chunk_size=100, chunk_overlap=0) as text_splitter:
+        for texts in text_splitter.split_texts([page.page_content for page in pages]):
+            print(texts)
+            print(len(texts))
+
+
 
 
 if __name__ == "__main__":
     # RecursiveCharacterTextSplitterDemo()
+    # LinearRecursiveCharacterTextSplitterDemo()
     # CharacterTextSplitterDemo()
     # TokenTextSplitterDemo()
+    # TokenBudgetTextSplitterDemo()
     # SpacyTextSplitterDemo()
     # SentenceTransformersTokenTextSplitterDemo()
-    NLTKTextSplitterDemo()
\ No newline at end of file
+    NLTKTextSplitterDemo()
+    # ParallelSentenceSplitterDemo()
\ No newline at end of file
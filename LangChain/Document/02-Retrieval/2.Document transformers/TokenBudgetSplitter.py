@@ -0,0 +1,193 @@
+import copy
+import re
+import time
+from bisect import bisect_left
+from collections import deque
+from typing import AbstractSet, Any, Collection, Deque, List, Literal, Optional, Sequence, Tuple, Union
+
+from langchain.schema import Document
+from langchain.text_splitter import TextSplitter
+
+# 按 token 预算分割文本（TokenBudgetTextSplitter）
+#   CharacterTextSplitter.from_tiktoken_encoder 在合并块时对每个候选片段单独调用一次 tiktoken 编码，
+#   TokenTextSplitter 每个实例都重新加载一次编码器。
+#   这里的分割器：
+#     1. 编码器由 tiktoken 按名称缓存，所有分割器实例共享同一个已加载的编码器；
+#     2. 每个文档只编码一次，create_documents 对多个文档用 encode_batch 多线程批量编码；
+#     3. 用 decode_with_offsets 得到每个 token 在原文中的字符位置，按 token 下标切块再映射回字符区间，
+#        输出的块是原文的子串，start_index 直接由区间得到；
+#        一个字符（中文、emoji 等）可能由多个 token 组成，窗口的首尾收缩到字符边界，丢掉不完整的 token，块不会超出 token 预算；
+#     4. 指定 separator 时先按分隔符切成片段，片段的 token 数用二分查找在整篇的 token 位置上计算，不再重新编码，
+#        再按 token 预算合并（与 CharacterTextSplitter.from_tiktoken_encoder 的用法一致）；超出预算的片段按 token 窗口切分。
+#   片段边界处的 BPE 合并与单独编码片段时可能略有不同，因此按分隔符合并时的 token 数是整篇编码下的计数。
+
+
+def get_tiktoken_encoding(encoding_name: str = "gpt2", model_name: Optional[str] = None) -> Any:
+    try:
+        import tiktoken
+    except ImportError:
+        raise ImportError("Could not import tiktoken python package. Please install it with `pip install tiktoken`.")
+    if model_name is not None:
+        return tiktoken.encoding_for_model(model_name)
+    return tiktoken.get_encoding(encoding_name)
+
+
+class TokenBudgetTextSplitter(TextSplitter):
+    def __init__(
+        self,
+        encoding_name: str = "gpt2",
+        model_name: Optional[str] = None,
+        separator: Optional[str] = None,
+        allowed_special: Union[Literal["all"], AbstractSet[str]] = set(),
+        disallowed_special: Union[Literal["all"], Collection[str]] = "all",
+        num_threads: int = 8,
+        **kwargs: Any,
+    ) -> None:
+        super().__init__(**kwargs)
+        self._tokenizer = get_tiktoken_encoding(encoding_name, model_name)
+        self._separator = separator
+        self._allowed_special = allowed_special
+        self._disallowed_special = disallowed_special
+        self._num_threads = num_threads
+
+    def _encode_batch(self, texts: List[str]) -> List[List[int]]:
+        if len(texts) == 1:
+            return [self._tokenizer.encode(texts[0], allowed_special=self._allowed_special, disallowed_special=self._disallowed_special)]
+        return self._tokenizer.encode_batch(texts, num_threads=self._num_threads, allowed_special=self._allowed_special, disallowed_special=self._disallowed_special)
+
+    # base 是 text 在原文中的位置，为 None 时块的位置未知（不写入 start_index）
+    def _emit(self, text: str, start: int, end: int, chunks: List[Tuple[str, Optional[int]]], base: Optional[int] = 0) -> None:
+        chunk = text[start:end]
+        if self._strip_whitespace:
+            stripped = chunk.lstrip()
+            start += len(chunk) - len(stripped)
+            chunk = stripped.rstrip()
+        if chunk:
+            chunks.append((chunk, base + start if base is not None else None))
+
+    # 在 token 下标区间 [lo, hi) 内按固定窗口切分
+    #   starts[t] 表示第 t 个 token 从一个字符的开头开始（None 表示全部是）。
+    #   窗口的结尾退回到字符边界，被截断的字符留给下一个窗口；开头跳过上一个字符剩余的 token。
+    #   单个字符的 token 数超过 chunk_size 时只能整体输出。
+    def _token_windows(self, text: str, offsets: Sequence[int], starts: Optional[Sequence[bool]], lo: int, hi: int, chunks: List[Tuple[str, Optional[int]]]) -> None:
+        step = max(1, self._chunk_size - self._chunk_overlap)
+        char_at = lambda t: offsets[t] if t < len(offsets) else len(text)
+        boundary = lambda t: starts is None or t >= len(starts) or starts[t]
+        i = lo
+        while i < hi and not boundary(i):
+            i += 1
+        while i < hi:
+            j = min(i + self._chunk_size, hi)
+            end = j
+            while end > i and not boundary(end):
+                end -= 1
+            if end == i:
+                end = j
+                while end < hi and not boundary(end):
+                    end += 1
+            self._emit(text, char_at(i), char_at(end), chunks)
+            if end >= hi:
+                break
+            i = min(i + step, end)
+            while i < hi and not boundary(i):
+                i += 1
+
+    def _split_with_tokens(self, text: str, tokens: List[int]) -> List[Tuple[str, Optional[int]]]:
+        decoded, offsets = self._tokenizer.decode_with_offsets(tokens)
+        if decoded != text:
+            # 特殊字符等导致无法映射回原文时，退化为按 token 解码（与 TokenTextSplitter 相同）；
+            # 块的位置用 find 在原文中查找，找不到时位置未知
+            step = max(1, self._chunk_size - self._chunk_overlap)
+            chunks: List[Tuple[str, Optional[int]]] = []
+            cursor = 0
+            for i in range(0, len(tokens), step):
+                piece = self._tokenizer.decode(tokens[i:i + self._chunk_size])
+                found = text.find(piece, cursor)
+                if found == -1:
+                    self._emit(piece, 0, len(piece), chunks, base=None)
+                else:
+                    self._emit(text, found, found + len(piece), chunks)
+                    cursor = found + 1
+            return chunks
+
+        # 非 ASCII 文本才需要区分字符中间的 token（首字节是 UTF-8 的后续字节 0b10xxxxxx）
+        starts = None if text.isascii() else [(b[0] & 0xC0) != 0x80 for b in self._tokenizer.decode_tokens_bytes(tokens)]
+        chunks: List[Tuple[str, Optional[int]]] = []
+        if self._separator is None:
+            self._token_windows(text, offsets, starts, 0, len(tokens), chunks)
+            return chunks
+
+        # 按分隔符切分成片段（分隔符留在片段末尾，相邻片段首尾相接）
+        bounds = [m.end() for m in re.finditer(re.escape(self._separator), text)] if self._separator else list(range(1, len(text)))
+        bounds = [0] + bounds + [len(text)]
+        current: Deque[Tuple[int, int, int]] = deque()
+        total = 0
+        for a, b in zip(bounds, bounds[1:]):
+            if a >= b:
+                continue
+            lo, hi = bisect_left(offsets, a), bisect_left(offsets, b)
+            count = hi - lo
+            if count > self._chunk_size:
+                # 单个片段超出预算：先输出已累计的块，再按 token 窗口切分该片段
+                if current:
+                    self._emit(text, current[0][0], current[-1][1], chunks)
+                    current.clear()
+                    total = 0
+                self._token_windows(text, offsets, starts, lo, hi, chunks)
+                continue
+            if total + count > self._chunk_size and current:
+                self._emit(text, current[0][0], current[-1][1], chunks)
+                while total > self._chunk_overlap or (total + count > self._chunk_size and total > 0):
+                    total -= current.popleft()[2]
+            current.append((a, b, count))
+            total += count
+        if current:
+            self._emit(text, current[0][0], current[-1][1], chunks)
+        return chunks
+
+    def split_text(self, text: str) -> List[str]:
+        return [chunk for chunk, _ in self._split_with_tokens(text, self._encode_batch([text])[0])]
+
+    def create_documents(self, texts: List[str], metadatas: Optional[List[dict]] = None) -> List[Document]:
+        _metadatas = metadatas or [{}] * len(texts)
+        documents = []
+        # 所有文档一次性批量编码
+        for i, (text, tokens) in enumerate(zip(texts, self._encode_batch(list(texts)))):
+            for chunk, start in self._split_with_tokens(text, tokens):
+                metadata = copy.deepcopy(_metadatas[i])
+                if self._add_start_index and start is not None:
+                    metadata["start_index"] = start
+                documents.append(Document(page_content=chunk, metadata=metadata))
+        return documents
+
+
+# 校验按 token 窗口切分时每个块重新编码后都不超过 chunk_size（中文、emoji 等多 token 字符）
+def check_budget(splitter: TokenBudgetTextSplitter, texts: Sequence[str]) -> None:
+    for text in texts:
+        for chunk in splitter.split_text(text):
+            count = len(splitter._tokenizer.encode(chunk, allowed_special=splitter._allowed_special, disallowed_special=splitter._disallowed_special))
+            assert count <= splitter._chunk_size, (chunk, count)
+
+
+if __name__ == "__main__":
+    from langchain.document_loaders import PyPDFLoader
+    from langchain.text_splitter import CharacterTextSplitter, TokenTextSplitter
+
+    pages = PyPDFLoader("./files/index.pdf").load()
+    pages = pages * 20  # 放大输入，模拟长 PDF
+
+    candidates = [
+        ("CharacterTextSplitter.from_tiktoken_encoder", lambda: CharacterTextSplitter.from_tiktoken_encoder(chunk_size=100, chunk_overlap=0)),
+        ("TokenBudgetTextSplitter(separator='\\n\\n')", lambda: TokenBudgetTextSplitter(separator="\n\n", chunk_size=100, chunk_overlap=0)),
+        ("TokenTextSplitter", lambda: TokenTextSplitter(chunk_size=100, chunk_overlap=0)),
+        ("TokenBudgetTextSplitter", lambda: TokenBudgetTextSplitter(chunk_size=100, chunk_overlap=0)),
+    ]
+    for name, build in candidates:
+        start = time.perf_counter()
+        docs = build().split_documents(pages)
+        print(f"{name}: {len(docs)} chunks in {time.perf_counter() - start:.3f}s")
+
+    samples = ["LangChain 是一个用于开发由语言模型驱动的应用程序的框架。😀🚀 表情符号和汉字都由多个 token 组成。" * 20]
+    for chunk_size, chunk_overlap in [(10, 0), (10, 3), (25, 5)]:
+        check_budget(TokenBudgetTextSplitter(chunk_size=chunk_size, chunk_overlap=chunk_overlap), samples)
+    print("token budget check passed")
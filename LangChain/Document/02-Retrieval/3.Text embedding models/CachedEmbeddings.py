@@ -0,0 +1,87 @@
+import hashlib
+import sqlite3
+import threading
+from typing import Iterator, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from langchain.embeddings import CacheBackedEmbeddings
+from langchain.embeddings.base import Embeddings
+from langchain.schema import BaseStore
+from langchain.storage.encoder_backed import EncoderBackedStore
+
+# 持久化的内容寻址嵌入缓存（PersistentCacheEmbeddings）
+#   VectorStore.py、tool_retriever.py、FewShotPromptTemplate.py 和 Selector.py 每次运行都会用 OpenAIEmbeddings() 重新嵌入相同的文本。
+#   这里基于 langchain 自带的 CacheBackedEmbeddings：
+#     1. 键是「模型名 + 文本的 sha256」，换模型不会读到旧向量；
+#     2. 向量以 float32 / float16 的二进制 BLOB 存在 SQLite 中（ada-002 的 1536 维向量约 6KB / 3KB，JSON 格式约 32KB）；
+#     3. embed_documents 先批量查询缓存，只把未命中的文本交给底层模型，再一次性写回；
+#     4. cache_queries=True 时 embed_query 也走缓存。
+#   语料只有少量变化时，重建索引只需要为变化的部分付费。
+
+
+class SQLiteByteStore(BaseStore[str, bytes]):
+    def __init__(self, database_path: str = "./files/.embeddings.db", batch_size: int = 500):
+        self.batch_size = batch_size  # SQLite 对单条语句的参数个数有限制，按批查询
+        self._conn = sqlite3.connect(database_path, check_same_thread=False)
+        self._conn.execute("CREATE TABLE IF NOT EXISTS embeddings (key TEXT PRIMARY KEY, value BLOB)")
+        self._conn.commit()
+        self._lock = threading.Lock()
+
+    def mget(self, keys: Sequence[str]) -> List[Optional[bytes]]:
+        found = {}
+        with self._lock:
+            for i in range(0, len(keys), self.batch_size):
+                batch = list(keys[i:i + self.batch_size])
+                placeholders = ",".join("?" * len(batch))
+                found.update(self._conn.execute(f"SELECT key, value FROM embeddings WHERE key IN ({placeholders})", batch).fetchall())
+        return [found.get(key) for key in keys]
+
+    def mset(self, key_value_pairs: Sequence[Tuple[str, bytes]]) -> None:
+        # 一个事务写入全部未命中的向量
+        with self._lock, self._conn:
+            self._conn.executemany("INSERT OR REPLACE INTO embeddings (key, value) VALUES (?, ?)", key_value_pairs)
+
+    def mdelete(self, keys: Sequence[str]) -> None:
+        with self._lock, self._conn:
+            self._conn.executemany("DELETE FROM embeddings WHERE key = ?", [(key,) for key in keys])
+
+    def yield_keys(self, prefix: Optional[str] = None) -> Iterator[str]:
+        with self._lock:
+            if prefix is None:
+                rows = self._conn.execute("SELECT key FROM embeddings").fetchall()
+            else:
+                rows = self._conn.execute("SELECT key FROM embeddings WHERE substr(key, 1, ?) = ?", (len(prefix), prefix)).fetchall()
+        for (key,) in rows:
+            yield key
+
+    def close(self) -> None:
+        self._conn.close()
+
+
+class PersistentCacheEmbeddings(CacheBackedEmbeddings):
+    def __init__(self, underlying_embeddings: Embeddings, database_path: str = "./files/.embeddings.db", namespace: Optional[str] = None, dtype: str = "float32", cache_queries: bool = True):
+        # 默认使用模型名作为命名空间，例如 OpenAIEmbeddings().model == "text-embedding-ada-002"
+        namespace = namespace or getattr(underlying_embeddings, "model", None) or type(underlying_embeddings).__name__
+        # 精度也是键的一部分，避免按错误的类型解析 BLOB
+        prefix = f"{namespace}:{dtype}:"
+        self.byte_store = SQLiteByteStore(database_path)
+        store = EncoderBackedStore(
+            self.byte_store,
+            lambda text: prefix + hashlib.sha256(text.encode("utf-8")).hexdigest(),
+            lambda vector: np.asarray(vector, dtype=dtype).tobytes(),
+            lambda blob: np.frombuffer(blob, dtype=dtype).astype("float32").tolist(),
+        )
+        super().__init__(underlying_embeddings, store)
+        self.cache_queries = cache_queries
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        # 先去重，相同文本只查询、嵌入一次
+        unique = list(dict.fromkeys(texts))
+        vectors = dict(zip(unique, super().embed_documents(unique)))
+        return [vectors[text] for text in texts]
+
+    def embed_query(self, text: str) -> List[float]:
+        if not self.cache_queries:
+            return self.underlying_embeddings.embed_query(text)
+        return self.embed_documents([text])[0]
@@ -17,4 +17,30 @@ print(len(embeddings[0]))
 
 # 查询嵌入
 query = embeddings_model.embed_query("What was the name mentioned in the conversation?")
-print(query[:5])
\ No newline at end of file
+print(query[:5])
+
+# 合并并发的查询请求：10ms 窗口内的 embed_query 合并为一次 embed_documents 请求，批次内相同的文本只嵌入一次
+from concurrent.futures import ThreadPoolExecutor
+from EmbeddingBatcher import EmbeddingBatcher
+
+batcher = EmbeddingBatcher(embeddings_model, max_batch_size=256, max_batch_tokens=8000, max_wait=0.01)
+queries = ["What was the name mentioned in the conversation?", "Hello World!", "What was the name mentioned in the conversation?"] * 10
+with ThreadPoolExecutor(max_workers=16) as executor:
+    vectors = list(executor.map(batcher.embed_query, queries))
+print(len(vectors))
+print(batcher.stats) # {'requests': 30, 'texts': 30, 'unique_texts': 2, 'batches': 1}，实际批次数取决于线程调度
+batcher.close()
+
+# 持久化嵌入缓存：向量按「模型名 + 文本 sha256」存入 SQLite，再次运行时只嵌入未命中的文本
+from CachedEmbeddings import PersistentCacheEmbeddings
+
+cached_embeddings = PersistentCacheEmbeddings(embeddings_model, database_path="./.embeddings.db", dtype="float16")
+vectors = cached_embeddings.embed_documents(["Hi there!", "Oh, hello!", "Hi there!"])  # 第一次运行时嵌入 2 个文本，之后全部命中缓存
+print(len(list(cached_embeddings.byte_store.yield_keys(prefix="text-embedding-ada-002:"))))
+
+# 本地 CPU 嵌入：字符 n-gram 哈希 + TF-IDF，不需要网络，可以离线建索引
+from LocalEmbeddings import HashingEmbeddings
+
+local_embeddings = HashingEmbeddings(dimensions=1024, num_threads=4)
+vectors = local_embeddings.embed_documents(["Hi there!", "Oh, hello!", "What's your name?", "My friends call me World", "Hello World!"])
+print(len(vectors), len(vectors[0]))  # 5 1024
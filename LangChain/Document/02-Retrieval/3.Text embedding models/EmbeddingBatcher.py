@@ -0,0 +1,154 @@
+import asyncio
+import threading
+import time
+from concurrent.futures import Future
+from queue import Empty, Queue
+from typing import Callable, Dict, List, Optional, Tuple
+
+from langchain.embeddings.base import Embeddings
+
+# 嵌入请求合并（EmbeddingBatcher）
+#   Embedding.py 和 01.model.py 中每次 embed_query / embed_documents 调用都是一次独立的请求。
+#   检索密集的服务里，很多线程会同时发起 embed_query。这里把短时间窗口（max_wait）内的并发请求合并成一个批次：
+#     1. 调用方立即拿到一个 Future，embed_query 只是等待这个 Future；
+#     2. 后台线程收集请求，直到达到批大小、token 上限或等待超时，然后调用一次底层的 embed_documents；
+#     3. 同一批次内相同的文本只嵌入一次，结果分发给所有请求它的调用方。
+#   接口与 Embeddings 相同，可以直接替换 OpenAIEmbeddings() 传给向量存储。
+
+
+def estimate_tokens(text: str) -> int:
+    return len(text) // 4 + 1
+
+
+class EmbeddingBatcher(Embeddings):
+    def __init__(
+        self,
+        embeddings: Embeddings,
+        max_batch_size: int = 256,
+        max_batch_tokens: int = 8000,
+        max_wait: float = 0.01,
+        token_counter: Callable[[str], int] = estimate_tokens,
+    ):
+        self.embeddings = embeddings
+        self.max_batch_size = max_batch_size
+        self.max_batch_tokens = max_batch_tokens
+        self.max_wait = max_wait
+        self.token_counter = token_counter
+        self.stats = {"requests": 0, "texts": 0, "unique_texts": 0, "batches": 0, "cancelled": 0}
+        self._stats_lock = threading.Lock()
+        self._queue: "Queue[Optional[Tuple[str, Future]]]" = Queue()
+        self._carry: Optional[Tuple[str, Future]] = None
+        self._closed = False
+        # 检查 _closed 和入队在同一把锁内完成，close 之后入队的请求不会落在结束标记（None）之后无人处理
+        self._submit_lock = threading.Lock()
+        self._worker = threading.Thread(target=self._run, name="EmbeddingBatcher", daemon=True)
+        self._worker.start()
+
+    def submit(self, text: str) -> "Future[List[float]]":
+        future: "Future[List[float]]" = Future()
+        with self._submit_lock:
+            if self._closed:
+                raise RuntimeError("EmbeddingBatcher is closed")
+            self._queue.put((text, future))
+        return future
+
+    def _count(self, **counts: int) -> None:
+        with self._stats_lock:
+            for key, n in counts.items():
+                self.stats[key] += n
+
+    def embed_query(self, text: str) -> List[float]:
+        self._count(requests=1)
+        return self.submit(text).result()
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        self._count(requests=1)
+        futures = [self.submit(text) for text in texts]
+        return [f.result() for f in futures]
+
+    async def aembed_query(self, text: str) -> List[float]:
+        self._count(requests=1)
+        return await asyncio.wrap_future(self.submit(text))
+
+    async def aembed_documents(self, texts: List[str]) -> List[List[float]]:
+        self._count(requests=1)
+        return list(await asyncio.gather(*[asyncio.wrap_future(self.submit(t)) for t in texts]))
+
+    # 收集一个批次：等到第一个请求后，最多再等 max_wait 秒
+    def _collect(self) -> Optional[Dict[str, List[Future]]]:
+        first = self._carry or self._queue.get()
+        self._carry = None
+        if first is None:
+            return None
+        batch: Dict[str, List[Future]] = {first[0]: [first[1]]}
+        tokens = self.token_counter(first[0])
+        deadline = time.monotonic() + self.max_wait
+        while len(batch) < self.max_batch_size:
+            timeout = deadline - time.monotonic()
+            if timeout <= 0:
+                break
+            try:
+                item = self._queue.get(timeout=timeout)
+            except Empty:
+                break
+            if item is None:
+                self._queue.put(None)
+                break
+            text, future = item
+            if text in batch:
+                # 去重：相同文本共用一次嵌入结果
+                batch[text].append(future)
+                continue
+            cost = self.token_counter(text)
+            if tokens + cost > self.max_batch_tokens:
+                # 超出 token 上限，留到下一个批次
+                self._carry = item
+                break
+            batch[text] = [future]
+            tokens += cost
+        return batch
+
+    def _dispatch(self, batch: Dict[str, List[Future]]) -> None:
+        # 调用方取消的请求（例如 asyncio.wait_for 超时取消了 aembed_query）不再嵌入；
+        # set_running_or_notify_cancel 之后 Future 不能再被取消，set_result 不会失败
+        total = sum(len(fs) for fs in batch.values())
+        live = {text: [f for f in futures if f.set_running_or_notify_cancel()] for text, futures in batch.items()}
+        live = {text: futures for text, futures in live.items() if futures}
+        self._count(batches=1 if live else 0, unique_texts=len(live), texts=total, cancelled=total - sum(len(fs) for fs in live.values()))
+        if not live:
+            return
+        texts = list(live)
+        try:
+            vectors = self.embeddings.embed_documents(texts)
+            if len(vectors) != len(texts):
+                raise ValueError(f"Expected {len(texts)} embeddings, got {len(vectors)}")
+        except Exception as e:
+            for futures in live.values():
+                for f in futures:
+                    f.set_exception(e)
+            return
+        for text, vector in zip(texts, vectors):
+            for f in live[text]:
+                f.set_result(vector)
+
+    def _run(self) -> None:
+        while True:
+            batch = self._collect()
+            if batch is None:
+                return
+            try:
+                self._dispatch(batch)
+            except Exception as e:
+                # 一个批次出错不能让后台线程退出，否则之后所有的请求都会一直等待
+                for futures in batch.values():
+                    for f in futures:
+                        if not f.done():
+                            f.set_exception(e)
+
+    def close(self) -> None:
+        with self._submit_lock:
+            if self._closed:
+                return
+            self._closed = True
+            self._queue.put(None)
+        self._worker.join()
@@ -0,0 +1,150 @@
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from langchain.embeddings.base import Embeddings
+
+# 本地 CPU 嵌入（HashingEmbeddings）
+#   Embedding.py 和各个向量存储示例都依赖 OpenAIEmbeddings，建索引的速度受网络限制，也无法离线建索引。
+#   这里实现一个不需要模型文件、不需要网络的嵌入：字符 n-gram 哈希 + TF-IDF 加权。
+#     1. 一个批次的文本拼接成一个 Unicode 码点数组，所有 n-gram 的哈希值用 NumPy 向量化计算（滚动多项式哈希 + 混合函数），
+#        不在 Python 中逐个 n-gram 循环；
+#     2. 哈希值决定维度和符号（signed hashing），用一次 np.bincount 得到整个批次的词频矩阵；
+#     3. 词频取 log1p（次线性 TF），调用 fit 后再乘以各维度的 IDF，最后做 L2 归一化，可以直接用内积 / 余弦相似度检索；
+#     4. 大批量按 batch_size 切分，用 num_threads 个线程并行计算（NumPy 的大部分运算会释放 GIL）。
+#   哈希函数是确定的，同一段文本在任何进程、任何机器上得到相同的向量，适合离线建索引。
+#   它只捕捉字面相似性，语义质量不如 OpenAI 或 sentence-transformers 模型；
+#   需要语义模型又要离线时，可以用 langchain 自带的 HuggingFaceEmbeddings（sentence-transformers，CPU 运行），见 benchmark。
+
+_PRIME = np.uint64(1_000_003)
+_MIX1 = np.uint64(0xFF51AFD7ED558CCD)
+_MIX2 = np.uint64(0xC4CEB9FE1A85EC53)
+
+
+def _mix(h: np.ndarray) -> np.ndarray:
+    # MurmurHash3 的 64 位混合函数，让相近的 n-gram 落到不同的维度
+    h = h ^ (h >> np.uint64(33))
+    h = h * _MIX1
+    h = h ^ (h >> np.uint64(33))
+    h = h * _MIX2
+    return h ^ (h >> np.uint64(33))
+
+
+class HashingEmbeddings(Embeddings):
+    def __init__(
+        self,
+        dimensions: int = 1024,
+        ngram_range: Tuple[int, int] = (2, 4),
+        lowercase: bool = True,
+        batch_size: int = 512,
+        num_threads: Optional[int] = None,
+    ):
+        self.dimensions = dimensions
+        self.ngram_range = ngram_range
+        self.lowercase = lowercase
+        self.batch_size = batch_size
+        self.num_threads = num_threads or os.cpu_count() or 1
+        self.idf: Optional[np.ndarray] = None
+
+    # 整个批次的哈希词频矩阵，形状为 (len(texts), dimensions)
+    def _term_frequencies(self, texts: Sequence[str]) -> np.ndarray:
+        if self.lowercase:
+            texts = [t.lower() for t in texts]
+        # 文本直接拼接，每个位置所属的文本下标由各文本的长度得到（文本中可以包含任何字符，包括 PDF 中常见的 \x00）
+        codes = np.frombuffer("".join(texts).encode("utf-32-le"), dtype=np.uint32).astype(np.uint64)
+        rows = np.repeat(np.arange(len(texts)), [len(t) for t in texts])
+        indices, signs = [], []
+        low, high = self.ngram_range
+        for n in range(low, high + 1):
+            size = len(codes) - n + 1
+            if size <= 0:
+                continue
+            h = np.full(size, n, dtype=np.uint64)
+            for k in range(n):
+                h = h * _PRIME + codes[k:k + size]
+            # 跨越文本边界的 n-gram 丢弃
+            valid = rows[:size] == rows[n - 1:n - 1 + size]
+            h = _mix(h[valid])
+            indices.append(rows[:size][valid].astype(np.int64) * self.dimensions + (h % np.uint64(self.dimensions)).astype(np.int64))
+            signs.append(np.where(h >> np.uint64(63), -1.0, 1.0))
+        # 所有 n-gram 一次 bincount 累加到 (文本, 维度) 上
+        index = np.concatenate(indices) if indices else np.zeros(0, dtype=np.int64)
+        weights = np.concatenate(signs) if signs else np.zeros(0)
+        counts = np.bincount(index, weights=weights, minlength=len(texts) * self.dimensions)
+        return counts.astype(np.float32).reshape(len(texts), self.dimensions)
+
+    def _embed_batch(self, texts: Sequence[str]) -> np.ndarray:
+        tf = self._term_frequencies(texts)
+        vectors = np.sign(tf) * np.log1p(np.abs(tf))
+        if self.idf is not None:
+            vectors *= self.idf
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        norms[norms == 0] = 1.0
+        return vectors / norms
+
+    def fit(self, texts: Sequence[str]) -> "HashingEmbeddings":
+        """Learn per-dimension IDF weights from a corpus (optional)."""
+        df = np.zeros(self.dimensions, dtype=np.float64)
+        for i in range(0, len(texts), self.batch_size):
+            df += (self._term_frequencies(texts[i:i + self.batch_size]) != 0).sum(axis=0)
+        self.idf = (np.log((1 + len(texts)) / (1 + df)) + 1).astype(np.float32)
+        return self
+
+    def embed(self, texts: Sequence[str]) -> np.ndarray:
+        batches = [texts[i:i + self.batch_size] for i in range(0, len(texts), self.batch_size)]
+        if not batches:
+            return np.zeros((0, self.dimensions), dtype=np.float32)
+        if len(batches) == 1 or self.num_threads == 1:
+            return np.vstack([self._embed_batch(b) for b in batches])
+        with ThreadPoolExecutor(max_workers=min(self.num_threads, len(batches))) as executor:
+            return np.vstack(list(executor.map(self._embed_batch, batches)))
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        return self.embed(texts).tolist()
+
+    def embed_query(self, text: str) -> List[float]:
+        return self.embed([text])[0].tolist()
+
+
+# ################ Benchmark ################
+
+def benchmark(texts: List[str], candidates: List[Tuple[str, Embeddings]], repeat: int = 1) -> None:
+    total = sum(len(t) for t in texts)
+    for name, embeddings in candidates:
+        start = time.perf_counter()
+        for _ in range(repeat):
+            vectors = embeddings.embed_documents(texts)
+        seconds = (time.perf_counter() - start) / repeat
+        print(f"{name}: {len(texts) / seconds:,.0f} texts/s, {total / seconds / 1e6:.2f}M chars/s, dim={len(vectors[0])}")
+
+
+if __name__ == "__main__":
+    # 20000 个约 500 字符的文本块，模拟一次较大的建索引任务
+    sentences = [
+        "LangChain is a framework for developing applications powered by language models. ",
+        "It enables applications that are context-aware and can reason about how to answer. ",
+        "加载文档后，您通常会想要对其进行转换以更好地适合您的应用程序。",
+        "向量存储负责存储嵌入数据并为您执行向量搜索。",
+    ]
+    texts = [f"chunk {i}: " + "".join(sentences[(i + j) % len(sentences)] for j in range(6)) for i in range(20_000)]
+
+    candidates: List[Tuple[str, Embeddings]] = [
+        ("HashingEmbeddings (1 thread)", HashingEmbeddings(num_threads=1)),
+        (f"HashingEmbeddings ({os.cpu_count()} threads)", HashingEmbeddings()),
+    ]
+    try:
+        from langchain.embeddings import HuggingFaceEmbeddings
+
+        candidates.append(("HuggingFaceEmbeddings (all-MiniLM-L6-v2, CPU)", HuggingFaceEmbeddings(model_name="sentence-transformers/all-MiniLM-L6-v2", model_kwargs={"device": "cpu"})))
+    except ImportError:
+        print("sentence-transformers is not installed, skip HuggingFaceEmbeddings")
+    benchmark(texts, candidates)
+
+    # 远程嵌入较慢且计费，只用一小部分文本
+    if os.environ.get("OPENAI_API_KEY"):
+        from langchain.embeddings import OpenAIEmbeddings
+
+        benchmark(texts[:500], [("OpenAIEmbeddings", OpenAIEmbeddings())])
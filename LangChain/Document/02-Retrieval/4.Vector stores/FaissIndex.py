@@ -0,0 +1,258 @@
+import logging
+import math
+import time
+import uuid
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from langchain.docstore.in_memory import InMemoryDocstore
+from langchain.embeddings.base import Embeddings
+from langchain.schema import Document
+from langchain.vectorstores import FAISS
+from langchain.vectorstores.faiss import dependable_faiss_import
+from langchain.vectorstores.utils import DistanceStrategy
+
+from MMR import maximal_marginal_relevance
+
+logger = logging.getLogger(__name__)
+
+# 可配置索引类型的 FAISS 向量存储（IndexedFAISS）
+#   FAISS.from_documents / from_texts 总是创建 IndexFlatL2（或 IndexFlatIP）精确索引：
+#   100 个工具没有问题，但检索时间随向量数线性增长，每个向量每一维占 4 字节。
+#   这里的 IndexedFAISS 是 FAISS 的子类，from_texts / from_documents / from_embeddings 多了以下参数：
+#     index_type   "flat"（默认，与 FAISS 相同）、"ivf_flat"、"ivf_pq"、"hnsw"、"sq8"（8 位标量量化）、"sq4"；
+#     nlist        IVF 的聚类中心数，默认约 4·sqrt(n)；
+#     pq_m/pq_nbits  PQ 的子空间数和每个子空间的位数，pq_m 必须整除维度，默认每个子空间 8 维；
+#     hnsw_m       HNSW 每个节点的邻居数；
+#     train_size   需要训练的索引（IVF、PQ、SQ）只在随机抽取的 train_size 个向量上训练；
+#     nprobe / ef_search  检索参数，之后也可以用 set_search_params 调整。
+#   向量太少、无法训练时（例如 6 个示例），自动退回 flat 并记录警告。
+#   IVF 索引用哈希表维护 id 到向量的直接映射，同时支持 reconstruct（max_marginal_relevance_search 取回候选向量）和 delete（remove_ids）。
+#   IVF 删除向量后其余向量的 id 不会重新编号，因此 IVF 索引添加向量时显式指定 id，index_to_docstore_id 的键就是索引中的 id。
+#   max_marginal_relevance_search 使用 MMR.py 中向量化的实现，候选向量一次 reconstruct_batch 取回。
+#   召回率与延迟的取舍因集合而异，运行 python FaissIndex.py 比较各种索引和参数。
+
+INDEX_TYPES = ("flat", "ivf_flat", "ivf_pq", "hnsw", "sq8", "sq4")
+
+
+def index_description(index_type: str, dimension: int, n: int, nlist: Optional[int] = None, pq_m: Optional[int] = None, pq_nbits: int = 8, hnsw_m: int = 32) -> str:
+    """Return the faiss.index_factory string for an index type, or "Flat" when `n` vectors are too few to train it."""
+    if index_type not in INDEX_TYPES:
+        raise ValueError(f"Unknown index type `{index_type}`, expected one of {INDEX_TYPES}")
+    if index_type == "flat":
+        return "Flat"
+    if index_type == "hnsw":
+        return f"HNSW{hnsw_m}"
+    if index_type in ("sq8", "sq4"):
+        return index_type.upper()
+    # 每个聚类中心至少需要 39 个训练点；PQ 每个子空间有 2^nbits 个中心，训练点不足时减少位数
+    nlist = min(nlist or max(1, int(4 * math.sqrt(n))), n // 39)
+    if index_type == "ivf_pq":
+        pq_nbits = min(pq_nbits, int(math.log2(max(1, n // 39))))
+    if nlist < 1 or (index_type == "ivf_pq" and pq_nbits < 4):
+        logger.warning(f"{n} vectors are too few to train `{index_type}`, falling back to a flat index")
+        return "Flat"
+    if index_type == "ivf_flat":
+        return f"IVF{nlist},Flat"
+    pq_m = pq_m or max(1, dimension // 8)
+    if dimension % pq_m:
+        raise ValueError(f"pq_m={pq_m} must divide the dimension {dimension}")
+    return f"IVF{nlist},PQ{pq_m}x{pq_nbits}"
+
+
+def create_index(
+    vectors: np.ndarray,
+    index_type: str = "flat",
+    distance_strategy: DistanceStrategy = DistanceStrategy.EUCLIDEAN_DISTANCE,
+    train_size: int = 50_000,
+    seed: int = 0,
+    **index_kwargs: Any,
+) -> Any:
+    """Create an empty, trained faiss index suitable for `vectors`."""
+    faiss = dependable_faiss_import()
+    n, dimension = vectors.shape
+    metric = faiss.METRIC_INNER_PRODUCT if distance_strategy == DistanceStrategy.MAX_INNER_PRODUCT else faiss.METRIC_L2
+    index = faiss.index_factory(dimension, index_description(index_type, dimension, n, **index_kwargs), metric)
+    if not index.is_trained:
+        # 只在样本上训练，训练时间与集合大小无关
+        sample = vectors
+        if n > train_size:
+            sample = vectors[np.random.default_rng(seed).choice(n, train_size, replace=False)]
+        index.train(np.ascontiguousarray(sample, dtype=np.float32))
+    ivf = faiss.try_extract_index_ivf(index)
+    if ivf is not None:
+        ivf.set_direct_map_type(faiss.DirectMap.Hashtable)
+    return index
+
+
+def set_search_params(index: Any, nprobe: Optional[int] = None, ef_search: Optional[int] = None) -> None:
+    faiss = dependable_faiss_import()
+    ivf = faiss.try_extract_index_ivf(index)
+    if nprobe is not None and ivf is not None:
+        ivf.nprobe = nprobe
+    hnsw = faiss.downcast_index(index)
+    if ef_search is not None and hasattr(hnsw, "hnsw"):
+        hnsw.hnsw.efSearch = ef_search
+
+
+def index_size(index: Any) -> int:
+    """Serialized size of the index in bytes."""
+    return len(dependable_faiss_import().serialize_index(index))
+
+
+class IndexedFAISS(FAISS):
+    def set_search_params(self, nprobe: Optional[int] = None, ef_search: Optional[int] = None) -> None:
+        set_search_params(self.index, nprobe=nprobe, ef_search=ef_search)
+
+    def _is_ivf(self) -> bool:
+        return dependable_faiss_import().try_extract_index_ivf(self.index) is not None
+
+    # IVF 索引：新向量的 id 接在已用过的最大 id 之后
+    def _add_with_ids(self, texts: List[str], embeddings: List[List[float]], metadatas: Optional[List[dict]] = None, ids: Optional[List[str]] = None) -> List[str]:
+        if ids is not None and len(ids) != len(texts):
+            raise ValueError(f"Number of ids ({len(ids)}) does not match number of texts ({len(texts)})")
+        vectors = np.array(embeddings, dtype=np.float32)
+        if self._normalize_L2:
+            dependable_faiss_import().normalize_L2(vectors)
+        start = max(self.index_to_docstore_id, default=-1) + 1
+        positions = np.arange(start, start + len(texts), dtype=np.int64)
+        self.index.add_with_ids(vectors, positions)
+        ids = ids or [str(uuid.uuid4()) for _ in texts]
+        documents = [Document(page_content=t, metadata=m) for t, m in zip(texts, metadatas or [{} for _ in texts])]
+        self.docstore.add(dict(zip(ids, documents)))
+        self.index_to_docstore_id.update({int(p): id_ for p, id_ in zip(positions, ids)})
+        return ids
+
+    def add_texts(self, texts: Iterable[str], metadatas: Optional[List[dict]] = None, ids: Optional[List[str]] = None, **kwargs: Any) -> List[str]:
+        if not self._is_ivf():
+            return super().add_texts(texts, metadatas=metadatas, ids=ids, **kwargs)
+        texts = list(texts)
+        return self._add_with_ids(texts, [self.embedding_function(text) for text in texts], metadatas, ids)
+
+    def add_embeddings(self, text_embeddings: Iterable[Tuple[str, List[float]]], metadatas: Optional[List[dict]] = None, ids: Optional[List[str]] = None, **kwargs: Any) -> List[str]:
+        if not self._is_ivf():
+            return super().add_embeddings(text_embeddings, metadatas=metadatas, ids=ids, **kwargs)
+        text_embeddings = list(text_embeddings)
+        return self._add_with_ids([t for t, _ in text_embeddings], [v for _, v in text_embeddings], metadatas, ids)
+
+    def delete(self, ids: Optional[List[str]] = None, **kwargs: Any) -> Optional[bool]:
+        if not self._is_ivf():
+            return super().delete(ids, **kwargs)
+        if ids is None:
+            raise ValueError("No ids provided to delete.")
+        reversed_index = {id_: i for i, id_ in self.index_to_docstore_id.items()}
+        missing_ids = set(ids).difference(reversed_index)
+        if missing_ids:
+            raise ValueError(f"Some specified ids do not exist in the current store. Ids not found: {missing_ids}")
+        positions = [reversed_index[id_] for id_ in ids]
+        self.index.remove_ids(np.array(positions, dtype=np.int64))
+        self.docstore.delete(ids)
+        # 其余向量的 id 不变，只删除对应的键
+        for position in positions:
+            del self.index_to_docstore_id[position]
+        return True
+
+    def max_marginal_relevance_search_with_score_by_vector(
+        self,
+        embedding: List[float],
+        *,
+        k: int = 4,
+        fetch_k: int = 20,
+        lambda_mult: float = 0.5,
+        filter: Optional[Dict[str, Any]] = None,
+    ) -> List[Tuple[Document, float]]:
+        if filter is not None:
+            return super().max_marginal_relevance_search_with_score_by_vector(embedding, k=k, fetch_k=fetch_k, lambda_mult=lambda_mult, filter=filter)
+        scores, indices = self.index.search(np.array([embedding], dtype=np.float32), fetch_k)
+        found = indices[0] != -1
+        scores, indices = scores[0][found], indices[0][found]
+        if not len(indices):
+            return []
+        selected = maximal_marginal_relevance(np.array(embedding, dtype=np.float32), self.index.reconstruct_batch(indices), lambda_mult=lambda_mult, k=k)
+        return [(self.docstore.search(self.index_to_docstore_id[int(indices[i])]), scores[i]) for i in selected]
+
+    @classmethod
+    def from_texts(cls, texts: List[str], embedding: Embeddings, metadatas: Optional[List[dict]] = None, ids: Optional[List[str]] = None, **kwargs: Any) -> "IndexedFAISS":
+        embeddings = embedding.embed_documents(texts)
+        return cls.from_embeddings(list(zip(texts, embeddings)), embedding, metadatas=metadatas, ids=ids, **kwargs)
+
+    @classmethod
+    def from_embeddings(
+        cls,
+        text_embeddings: Iterable[Tuple[str, List[float]]],
+        embedding: Embeddings,
+        metadatas: Optional[Iterable[dict]] = None,
+        ids: Optional[List[str]] = None,
+        index_type: str = "flat",
+        train_size: int = 50_000,
+        nprobe: Optional[int] = None,
+        ef_search: Optional[int] = None,
+        normalize_L2: bool = False,
+        distance_strategy: DistanceStrategy = DistanceStrategy.EUCLIDEAN_DISTANCE,
+        **index_kwargs: Any,
+    ) -> "IndexedFAISS":
+        text_embeddings = list(text_embeddings)
+        vectors = np.array([v for _, v in text_embeddings], dtype=np.float32)
+        if normalize_L2:
+            dependable_faiss_import().normalize_L2(vectors)
+        index = create_index(vectors, index_type, distance_strategy, train_size, **index_kwargs)
+        store = cls(embedding.embed_query, index, InMemoryDocstore(), {}, normalize_L2=normalize_L2, distance_strategy=distance_strategy)
+        store.add_embeddings(text_embeddings, metadatas=list(metadatas) if metadatas is not None else None, ids=ids)
+        store.set_search_params(nprobe=nprobe, ef_search=ef_search)
+        return store
+
+
+# ################ Benchmark ################
+
+def clustered_vectors(n: int, dimension: int, clusters: int = 100, seed: int = 0) -> np.ndarray:
+    # 模拟嵌入向量：聚类分布并归一化，比均匀随机向量更接近真实的嵌入
+    rng = np.random.default_rng(seed)
+    centers = rng.standard_normal((clusters, dimension)).astype(np.float32)
+    vectors = centers[rng.integers(0, clusters, n)] + 0.5 * rng.standard_normal((n, dimension)).astype(np.float32)
+    return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+
+def benchmark(
+    vectors: np.ndarray,
+    queries: np.ndarray,
+    k: int = 10,
+    configs: Sequence[Tuple[str, Dict[str, Any], str, Sequence[int]]] = (
+        ("flat", {}, "", [0]),
+        ("sq8", {}, "", [0]),
+        ("ivf_flat", {}, "nprobe", [1, 4, 16, 64]),
+        ("ivf_pq", {}, "nprobe", [1, 4, 16, 64]),
+        ("hnsw", {}, "ef_search", [16, 32, 64, 128]),
+    ),
+) -> List[Dict[str, Any]]:
+    """Measure recall@k against exact search, latency per query and index size for each configuration."""
+    faiss = dependable_faiss_import()
+    exact = faiss.IndexFlatL2(vectors.shape[1])
+    exact.add(vectors)
+    _, truth = exact.search(queries, k)
+
+    rows = []
+    print(f"{'index':<10}{'param':>16}{'recall@' + str(k):>12}{'ms/query':>12}{'size MB':>10}{'build s':>10}")
+    for index_type, kwargs, param, values in configs:
+        start = time.perf_counter()
+        index = create_index(vectors, index_type, **kwargs)
+        index.add(vectors)
+        build = time.perf_counter() - start
+        size = index_size(index) / 1e6
+        for value in values:
+            if param:
+                set_search_params(index, **{param: value})
+            start = time.perf_counter()
+            _, found = index.search(queries, k)
+            latency = (time.perf_counter() - start) / len(queries) * 1000
+            recall = np.mean([len(set(f) & set(t)) / k for f, t in zip(found, truth)])
+            label = f"{param}={value}" if param else "-"
+            rows.append({"index": index_type, "param": label, "recall": recall, "ms_per_query": latency, "size_mb": size, "build_s": build})
+            print(f"{index_type:<10}{label:>16}{recall:>12.3f}{latency:>12.3f}{size:>10.1f}{build:>10.2f}")
+    return rows
+
+
+if __name__ == "__main__":
+    # 10 万个 256 维向量，500 个查询
+    data = clustered_vectors(100_000 + 500, 256)
+    benchmark(data[:100_000], data[100_000:])
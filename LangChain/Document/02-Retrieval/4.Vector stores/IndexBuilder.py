@@ -0,0 +1,192 @@
+import os
+import shutil
+import time
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from itertools import islice
+from typing import Any, Deque, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from langchain.embeddings.base import Embeddings
+from langchain.schema import Document
+from langchain.vectorstores import FAISS, Chroma
+from langchain.vectorstores.base import VectorStore
+
+# 流式建索引（StreamingIndexBuilder）
+#   VectorStore.py 和 PyPDFLoaderDemo 用 Chroma.from_documents(documents, OpenAIEmbeddings()) 建索引：
+#   所有文档和向量同时放在内存里，并且一次调用嵌入全部文本，中途失败只能从头再来。
+#   这里的构建器接收一个文档迭代器（例如 loader.lazy_load() 的分割结果）：
+#     1. 按 batch_size 分批读取，每批只嵌入一次；内存中最多同时存在 prefetch + 1 个批次，占用与语料大小无关；
+#     2. 嵌入在后台线程中进行，主线程同时把上一批写入向量存储，嵌入的网络等待与写入重叠；
+#     3. 每批直接写入已经算好的向量：FAISS 用 add_embeddings，Chroma 用 collection.upsert，不再重复嵌入；
+#     4. 定期把索引持久化到 persist_directory；中断后用同样的文档迭代器（和同样的 batch_size）重新运行，
+#        会加载已有索引，跳过已写入的文档继续构建。
+#   文档的 id 是它在迭代器中的序号，进度直接由已保存的索引得到，不另外记录：
+#     - FAISS：已写入的文档数就是 index.ntotal。save_local 每次重写整个索引，因此只在索引比上一个检查点至少翻倍时保存，
+#       总的写盘量与索引大小成正比；先保存到临时目录再替换，中途崩溃不会留下写了一半的索引；
+#     - Chroma：写入是增量的，每 checkpoint_every 批 persist 一次；一批分两次 upsert，崩溃时最后一批可能只写入一部分，
+#       进度取最后一批中第一个缺失的 id，重新写入的部分由 upsert 的幂等性保证。
+
+CHECKPOINT_DIR = ".checkpoint"
+FAISS_FILES = ("index.faiss", "index.pkl")
+
+
+def batched(iterable: Iterable[Any], size: int) -> Iterator[List[Any]]:
+    iterator = iter(iterable)
+    while batch := list(islice(iterator, size)):
+        yield batch
+
+
+class StreamingIndexBuilder:
+    def __init__(
+        self,
+        embeddings: Embeddings,
+        persist_directory: str,
+        store: str = "faiss",
+        batch_size: int = 256,
+        prefetch: int = 2,
+        checkpoint_every: int = 10,
+        collection_name: str = "langchain",
+    ):
+        if store not in ("faiss", "chroma"):
+            raise ValueError(f"Unknown store `{store}`, expected `faiss` or `chroma`")
+        self.embeddings = embeddings
+        self.persist_directory = persist_directory
+        self.store = store
+        self.batch_size = batch_size
+        self.prefetch = prefetch
+        self.checkpoint_every = checkpoint_every
+        self.collection_name = collection_name
+        self.vectorstore: Optional[VectorStore] = None
+        self.stats: Dict[str, float] = {"documents": 0, "skipped": 0, "batches": 0, "embed_wait": 0.0, "insert": 0.0, "checkpoint": 0.0}
+
+    def _save_faiss(self) -> None:
+        tmp = os.path.join(self.persist_directory, CHECKPOINT_DIR)
+        self.vectorstore.save_local(tmp)
+        # index.faiss 先替换，index.pkl 后替换；两次替换之间崩溃时由 _recover_faiss 补上 index.pkl
+        for name in FAISS_FILES:
+            os.replace(os.path.join(tmp, name), os.path.join(self.persist_directory, name))
+        os.rmdir(tmp)
+
+    def _recover_faiss(self) -> None:
+        tmp = os.path.join(self.persist_directory, CHECKPOINT_DIR)
+        if not os.path.isdir(tmp):
+            return
+        if not os.path.exists(os.path.join(tmp, FAISS_FILES[0])) and os.path.exists(os.path.join(tmp, FAISS_FILES[1])):
+            # 保存已经完成，只差替换 index.pkl
+            os.replace(os.path.join(tmp, FAISS_FILES[1]), os.path.join(self.persist_directory, FAISS_FILES[1]))
+        # 其余情况是没有保存完的检查点，persist_directory 中仍是上一个完整的检查点
+        shutil.rmtree(tmp)
+
+    def _write_checkpoint(self) -> None:
+        if self.vectorstore is None:
+            return
+        start = time.perf_counter()
+        if self.store == "faiss":
+            self._save_faiss()
+        else:
+            self.vectorstore.persist()
+        self.stats["checkpoint"] += time.perf_counter() - start
+
+    def _open(self) -> int:
+        if self.store == "chroma":
+            self.vectorstore = Chroma(collection_name=self.collection_name, embedding_function=self.embeddings, persist_directory=self.persist_directory)
+            collection = self.vectorstore._collection
+            count = collection.count()
+            # 只有最后一批可能不完整，检查它的 id 是否都已写入
+            candidates = [str(i) for i in range(max(0, count - self.batch_size), count)]
+            existing = set(collection.get(ids=candidates, include=[])["ids"]) if candidates else set()
+            return next((int(id) for id in candidates if id not in existing), count)
+        self._recover_faiss()
+        if os.path.exists(os.path.join(self.persist_directory, FAISS_FILES[0])):
+            self.vectorstore = FAISS.load_local(self.persist_directory, self.embeddings)
+            return self.vectorstore.index.ntotal
+        return 0
+
+    def _insert(self, batch: List[Document], vectors: List[List[float]], ids: List[str]) -> None:
+        texts = [doc.page_content for doc in batch]
+        metadatas = [doc.metadata for doc in batch]
+        if self.store == "faiss":
+            if self.vectorstore is None:
+                self.vectorstore = FAISS.from_embeddings(list(zip(texts, vectors)), self.embeddings, metadatas=metadatas, ids=ids)
+            else:
+                self.vectorstore.add_embeddings(list(zip(texts, vectors)), metadatas=metadatas, ids=ids)
+            return
+        # Chroma 不接受空的 metadata，有无 metadata 的文档分两次写入（与 Chroma.add_texts 相同）
+        for has_metadata in (True, False):
+            rows = [i for i, m in enumerate(metadatas) if bool(m) == has_metadata]
+            if rows:
+                self.vectorstore._collection.upsert(
+                    ids=[ids[i] for i in rows],
+                    embeddings=[vectors[i] for i in rows],
+                    documents=[texts[i] for i in rows],
+                    metadatas=[metadatas[i] for i in rows] if has_metadata else None,
+                )
+
+    def build(self, documents: Iterable[Document]) -> VectorStore:
+        os.makedirs(self.persist_directory, exist_ok=True)
+        done = self._open()
+        # 断点续建：跳过已经写入的文档
+        iterator = islice(documents, done, None)
+        self.stats["skipped"] = done
+        position = done
+        # 上一个检查点的文档数和之后写入的批数
+        saved, unsaved = done, 0
+
+        def flush(item: Tuple[List[Document], "Future[List[List[float]]]", int]) -> None:
+            nonlocal saved, unsaved
+            batch, future, offset = item
+            start = time.perf_counter()
+            vectors = future.result()
+            self.stats["embed_wait"] += time.perf_counter() - start
+            start = time.perf_counter()
+            self._insert(batch, vectors, [str(offset + i) for i in range(len(batch))])
+            self.stats["insert"] += time.perf_counter() - start
+            self.stats["documents"] += len(batch)
+            self.stats["batches"] += 1
+            unsaved += 1
+            end = offset + len(batch)
+            # Chroma 是增量写入，间隔固定；FAISS 每次重写整个索引，还要求索引至少翻倍
+            if unsaved >= self.checkpoint_every and (self.store != "faiss" or end >= 2 * saved):
+                self._write_checkpoint()
+                saved, unsaved = end, 0
+
+        pending: Deque[Tuple[List[Document], "Future[List[List[float]]]", int]] = deque()
+        with ThreadPoolExecutor(max_workers=1, thread_name_prefix="embed") as executor:
+            for batch in batched(iterator, self.batch_size):
+                pending.append((batch, executor.submit(self.embeddings.embed_documents, [d.page_content for d in batch]), position))
+                position += len(batch)
+                # 后台线程嵌入后面的批次，主线程写入最早的批次
+                if len(pending) > self.prefetch:
+                    flush(pending.popleft())
+            while pending:
+                flush(pending.popleft())
+        self._write_checkpoint()
+        if self.vectorstore is None:
+            raise ValueError("No documents to index")
+        return self.vectorstore
+
+
+if __name__ == "__main__":
+    import sys
+
+    from langchain.document_loaders import PyPDFLoader
+    from langchain.text_splitter import RecursiveCharacterTextSplitter
+
+    sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "3.Text embedding models"))
+    from LocalEmbeddings import HashingEmbeddings
+
+    text_splitter = RecursiveCharacterTextSplitter(chunk_size=300, chunk_overlap=0)
+
+    # 文档逐页加载、逐页分割，整个流水线中没有完整的文档列表；放大 200 倍模拟大语料
+    def documents() -> Iterator[Document]:
+        for _ in range(200):
+            for page in PyPDFLoader("./files/index.pdf").lazy_load():
+                yield from text_splitter.split_documents([page])
+
+    # 离线使用本地嵌入；换成 OpenAIEmbeddings() 时，嵌入的网络等待与写入重叠
+    builder = StreamingIndexBuilder(HashingEmbeddings(), persist_directory="./files/faiss_index", store="faiss", batch_size=256)
+    start = time.perf_counter()
+    db = builder.build(documents())
+    print(f"indexed in {time.perf_counter() - start:.2f}s", builder.stats)
+    docs = db.similarity_search("What is LLMSingleActionAgent?", k=2)
+    print(docs[0].page_content)
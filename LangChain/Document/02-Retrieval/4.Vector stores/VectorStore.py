@@ -3,6 +3,13 @@ from langchain.embeddings.openai import OpenAIEmbeddings
 from langchain.text_splitter import CharacterTextSplitter
 from langchain.vectorstores import Chroma
 
+import os
+import sys
+
+# 使用持久化的嵌入缓存，重复运行时不再重新嵌入相同的文本
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "3.Text embedding models"))
+from CachedEmbeddings import PersistentCacheEmbeddings
+
 baseDir = "./files/"
 
 # 加载PDF文档
@@ -12,7 +19,8 @@ content = loader.load()
 # 将文档分割成块
 text_splitter = CharacterTextSplitter(chunk_size=300, chunk_overlap=0)
 documents = text_splitter.split_documents(content)
-db = Chroma.from_documents(documents, OpenAIEmbeddings())
+embeddings = PersistentCacheEmbeddings(OpenAIEmbeddings(), database_path=baseDir + ".embeddings.db")
+db = Chroma.from_documents(documents, embeddings)
 
 query = "What is LLMSingleActionAgent?"
 
@@ -21,6 +29,19 @@ query = "What is LLMSingleActionAgent?"
 # print(docs[0].page_content)
 
 # 还可以搜索与给定嵌入向量类似的文档，使用 similarity_search_by_vector 该向量接受嵌入向量作为参数而不是字符串。
-embedding_vector = OpenAIEmbeddings().embed_query(query)
+embedding_vector = embeddings.embed_query(query)
 docs = db.similarity_search_by_vector(embedding_vector)
-print(docs[0].page_content)
\ No newline at end of file
+print(docs[0].page_content)
+
+# 批量搜索：一次传入多个查询向量，返回每个查询的 top-k
+# from BatchSearch import similarity_search_batch
+#
+# queries = ["What is LLMSingleActionAgent?", "What is a stop sequence?"]
+# for docs in similarity_search_batch(db, embeddings.embed_documents(queries), k=2):
+#     print(docs[0].page_content)
+
+# 大语料建索引：流式分批嵌入、边嵌入边写入，定期保存进度，中断后重新运行会从断点继续
+# from IndexBuilder import StreamingIndexBuilder
+#
+# builder = StreamingIndexBuilder(embeddings, persist_directory=baseDir + "chroma_index", store="chroma", batch_size=256)
+# db = builder.build(doc for page in UnstructuredPDFLoader(baseDir + "index.pdf").lazy_load() for doc in text_splitter.split_documents([page]))
@@ -0,0 +1,178 @@
+import contextlib
+import io
+import os
+import random
+import sys
+import time
+import tracemalloc
+import types
+from typing import Any, Callable, Dict, List, Optional
+
+from langchain import ConversationChain, PromptTemplate
+from langchain.agents import AgentExecutor, LLMSingleActionAgent, Tool
+from langchain.callbacks.manager import CallbackManagerForLLMRun
+from langchain.chains import LLMChain, SimpleSequentialChain
+from langchain.llms.base import LLM
+from langchain.schema import LLMResult
+
+# 离线基准测试（不访问网络）
+#   参考 FakeListLLM.py 和 CustomLLM.py 的思路，用一个可配置的假 LLM 替换 OpenAI：
+#     - 按脚本顺序返回预设的回复；
+#     - 延迟可以是固定值，也可以服从均匀/正态/对数正态分布；
+#     - 可以模拟 token 数量，写入 llm_output["token_usage"]。
+#   分别驱动 03.chain.py 中的 SimpleSequentialChain、04.memory.py 中的 ConversationChain，
+#   以及 003_custom_agent_with_tool_retrieval/index.py 中的 LLMSingleActionAgent，
+#   统计每次调用的框架开销（总耗时减去模拟的模型延迟）、内存分配和吞吐量。
+
+rng = random.Random(0)
+
+
+# 可配置的假 LLM
+class BenchmarkLLM(LLM):
+    responses: List[str]
+    latency: str = "fixed"  # fixed | uniform | normal | lognormal
+    latency_mean: float = 0.0
+    latency_std: float = 0.0
+    completion_tokens: Optional[int] = None  # 为 None 时按空格切分回复估算
+    i: int = 0
+    calls: int = 0
+    slept: float = 0.0
+
+    @property
+    def _llm_type(self) -> str:
+        return "benchmark"
+
+    def _sample_latency(self) -> float:
+        if self.latency == "uniform":
+            return rng.uniform(max(0.0, self.latency_mean - self.latency_std), self.latency_mean + self.latency_std)
+        if self.latency == "normal":
+            return max(0.0, rng.gauss(self.latency_mean, self.latency_std))
+        if self.latency == "lognormal" and self.latency_mean > 0:
+            return rng.lognormvariate(0, self.latency_std) * self.latency_mean
+        return self.latency_mean
+
+    def _call(
+        self,
+        prompt: str,
+        stop: Optional[List[str]] = None,
+        run_manager: Optional[CallbackManagerForLLMRun] = None,
+        **kwargs: Any,
+    ) -> str:
+        delay = self._sample_latency()
+        if delay:
+            time.sleep(delay)
+        self.slept += delay
+        self.calls += 1
+        response = self.responses[self.i]
+        self.i = (self.i + 1) % len(self.responses)
+        return response
+
+    def _generate(self, prompts: List[str], stop: Optional[List[str]] = None, run_manager: Optional[CallbackManagerForLLMRun] = None, **kwargs: Any) -> LLMResult:
+        result = super()._generate(prompts, stop=stop, run_manager=run_manager, **kwargs)
+        prompt_tokens = sum(len(p.split()) for p in prompts)
+        completion_tokens = sum(self.completion_tokens if self.completion_tokens is not None else len(g.text.split()) for gens in result.generations for g in gens)
+        result.llm_output = {
+            "token_usage": {"prompt_tokens": prompt_tokens, "completion_tokens": completion_tokens, "total_tokens": prompt_tokens + completion_tokens},
+            "model_name": self._llm_type,
+        }
+        return result
+
+    def reset(self) -> None:
+        self.i = 0
+        self.calls = 0
+        self.slept = 0.0
+
+
+# 03.chain.py -> SimpleSequentialChain
+def build_sequential_chain(llm: BenchmarkLLM) -> Callable[[], Any]:
+    chain1 = LLMChain(llm=llm, prompt=PromptTemplate(input_variables=["lastname"], template="我的邻居姓{lastname}，他生了个儿子，给他儿子起个名字"))
+    chain2 = LLMChain(llm=llm, prompt=PromptTemplate(input_variables=["child_name"], template="邻居的儿子名字叫{child_name}，给他起一个小名"))
+    overall_chain = SimpleSequentialChain(chains=[chain1, chain2])
+    return lambda: overall_chain.run("王")
+
+
+# 04.memory.py -> ConversationChain，每次迭代是一段新的三轮对话
+def build_conversation_chain(llm: BenchmarkLLM) -> Callable[[], Any]:
+    def run():
+        conversation = ConversationChain(llm=llm)
+        conversation.predict(input="小明有1只猫")
+        conversation.predict(input="小刚有2只狗")
+        return conversation.run("小明和小刚一共有几只宠物?")
+
+    return run
+
+
+# 003_custom_agent_with_tool_retrieval/index.py -> LLMSingleActionAgent
+def build_custom_agent(llm: BenchmarkLLM) -> Callable[[], Any]:
+    agent_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "01-核心模块", "01.Agents代理", "003_custom_agent_with_tool_retrieval")
+    sys.path.insert(0, agent_dir)
+
+    fake_tools = [Tool(name="Search", func=lambda q: "Sunny, 28°C", description="useful for when you need to answer questions about current events")]
+    fake_tools += [Tool(name=f"foo-{i}", func=lambda q: "foo", description=f"a silly function that you can use to get more information about the number {i}") for i in range(3)]
+
+    # 真实的 tool_retriever 需要 OpenAI 和 SerpAPI 的 key，这里替换成固定的工具列表
+    retriever = types.ModuleType("tool_retriever")
+    retriever.get_tools = lambda query: fake_tools
+    sys.modules.setdefault("tool_retriever", retriever)
+
+    import output_parser
+    import prompt_template
+
+    prompt = prompt_template.CustomPromptTemplate(template=prompt_template.template, tools_getter=lambda query: fake_tools, input_variables=["input", "intermediate_steps"])
+    llm_chain = LLMChain(llm=llm, prompt=prompt)
+    agent = LLMSingleActionAgent(llm_chain=llm_chain, output_parser=output_parser.CustomOutputParser(), stop=["\nObservation:"], allowed_tools=[t.name for t in fake_tools])
+    executor = AgentExecutor.from_agent_and_tools(agent=agent, tools=fake_tools)
+    return lambda: executor.run("深圳今天的天气怎么样?")
+
+
+SCENARIOS = {
+    "SimpleSequentialChain": (build_sequential_chain, ["王小明", "小明"]),
+    "ConversationChain": (build_conversation_chain, ["好的，小明有1只猫。", "好的，小刚有2只狗。", "一共有3只宠物。"]),
+    "LLMSingleActionAgent": (build_custom_agent, [
+        "Thought: I need to find out the weather in Shenzhen.\nAction: Search\nAction Input: Shenzhen weather",
+        "Thought: I now know the final answer\nFinal Answer: Arg, it be sunny in Shenzhen!",
+    ]),
+}
+
+
+def run_benchmark(name: str, iterations: int = 200, warmup: int = 10, **llm_kwargs) -> Dict[str, float]:
+    build, responses = SCENARIOS[name]
+    llm = BenchmarkLLM(responses=responses, **llm_kwargs)
+    run = build(llm)
+
+    # 示例代码里有大量 print，基准测试时全部丢弃
+    with contextlib.redirect_stdout(io.StringIO()):
+        for _ in range(warmup):
+            run()
+
+        # 第一轮：计时
+        llm.reset()
+        start = time.perf_counter()
+        for _ in range(iterations):
+            run()
+        wall = time.perf_counter() - start
+        calls, slept = llm.calls, llm.slept
+
+        # 第二轮：统计内存分配（tracemalloc 本身有开销，因此和计时分开）
+        tracemalloc.start()
+        before, _ = tracemalloc.get_traced_memory()
+        for _ in range(iterations):
+            run()
+        after, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+    return {
+        "iterations": iterations,
+        "llm_calls": calls,
+        "wall_seconds": wall,
+        "throughput": iterations / wall if wall else 0.0,
+        "overhead_ms_per_call": (wall - slept) / calls * 1000 if calls else 0.0,
+        "retained_kib": (after - before) / 1024,
+        "peak_kib": peak / 1024,
+    }
+
+
+if __name__ == '__main__':
+    for scenario in SCENARIOS:
+        print(scenario, run_benchmark(scenario, iterations=200))
+        # print(scenario, run_benchmark(scenario, iterations=50, latency="lognormal", latency_mean=0.01, latency_std=0.5))
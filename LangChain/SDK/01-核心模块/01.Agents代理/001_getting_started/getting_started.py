@@ -1,8 +1,16 @@
 from langchain.agents import load_tools
 from langchain.agents import initialize_agent
 from langchain.agents import AgentType
+from langchain.agents import ZeroShotAgent
+from langchain.chains import LLMChain
 from langchain.llms import OpenAI
 
+import os
+import sys
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from concurrent_executor import MULTI_ACTION_FORMAT_INSTRUCTIONS, ConcurrentAgentExecutor, LLMMultiActionAgent, MultiActionOutputParser
+
 
 # 简单的Demo示例
 def generate_llm_reply():
@@ -12,5 +20,17 @@ def generate_llm_reply():
     agent.run("Who is Xijinpin's girlfriend? What is her current age raised to the 2 power?")
 
 
+# 并发执行工具：模型可以在一步中同时给出 serpapi 和 llm-math 等互不依赖的动作，
+# 它们在线程池中同时运行，每个工具最多 30 秒，观察结果按动作的顺序返回给模型
+def generate_llm_reply_concurrently():
+    llm = OpenAI(temperature=0)
+    tools = load_tools(["serpapi", "llm-math"], llm=llm)
+    prompt = ZeroShotAgent.create_prompt(tools, format_instructions=MULTI_ACTION_FORMAT_INSTRUCTIONS)
+    agent = LLMMultiActionAgent(llm_chain=LLMChain(llm=llm, prompt=prompt), output_parser=MultiActionOutputParser(), stop=["\nObservation:"], allowed_tools=[tool.name for tool in tools])
+    agent_executor = ConcurrentAgentExecutor.from_agent_and_tools(agent=agent, tools=tools, max_concurrency=4, tool_timeout=30, verbose=True)
+    agent_executor.run("Who is Xijinpin's girlfriend? What is her current age raised to the 2 power?")
+
+
 if __name__ == '__main__':
     generate_llm_reply()
+    # generate_llm_reply_concurrently()
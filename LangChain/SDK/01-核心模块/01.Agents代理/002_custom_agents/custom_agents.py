@@ -1,8 +1,14 @@
-from langchain.agents import Tool, AgentExecutor, BaseSingleActionAgent
+from langchain.agents import Tool, AgentExecutor, BaseSingleActionAgent, BaseMultiActionAgent
 from langchain import OpenAI, SerpAPIWrapper
 from typing import List, Tuple, Any, Union
 from langchain.schema import AgentAction, AgentFinish
 
+import os
+import sys
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from concurrent_executor import ConcurrentAgentExecutor
+
 search = SerpAPIWrapper()
 searchTool = Tool(name="Search", func=search.run, description="useful for when you need to answer questions about current events", return_direct=True)
 tools = [searchTool]
@@ -53,4 +59,29 @@ agent_executor.run("How many people live in canada as of 2023?")
 
 # 返回结果
 #   > Entering new AgentExecutor chain...
-#   Canada's population was estimated at 39,858,480 on April 1, 2023, an increase of 292,232 people (+0.7%) from January 1, 2023.
\ No newline at end of file
+#   Canada's population was estimated at 39,858,480 on April 1, 2023, an increase of 292,232 people (+0.7%) from January 1, 2023.
+
+
+# 定义一个假的多动作Agent：一步同时发起两个互不依赖的搜索，拿到结果后结束
+class FakeMultiActionAgent(BaseMultiActionAgent):
+    """Fake Custom Multi Action Agent."""
+
+    @property
+    def input_keys(self):
+        return ["input"]
+
+    def plan(self, intermediate_steps: List[Tuple[AgentAction, str]], **kwargs: Any) -> Union[List[AgentAction], AgentFinish]:
+        if intermediate_steps:
+            return AgentFinish(return_values={"output": "\n".join(observation for _, observation in intermediate_steps)}, log="")
+        return [
+            AgentAction(tool="Search", tool_input=kwargs["input"], log=""),
+            AgentAction(tool="Search", tool_input="How many people live in the US as of 2023?", log=""),
+        ]
+
+    async def aplan(self, intermediate_steps: List[Tuple[AgentAction, str]], **kwargs: Any) -> Union[List[AgentAction], AgentFinish]:
+        return self.plan(intermediate_steps, **kwargs)
+
+
+# 两个搜索在线程池中同时执行，每个最多 10 秒，结果按动作的顺序合并
+multi_agent_executor = ConcurrentAgentExecutor.from_agent_and_tools(agent=FakeMultiActionAgent(), tools=tools, max_concurrency=4, tool_timeout=10, verbose=True)
+# multi_agent_executor.run("How many people live in canada as of 2023?")
@@ -14,6 +14,13 @@ from langchain.callbacks import (get_openai_callback)
 import tool_retriever
 import prompt_template
 import output_parser
+from streaming_agent import StreamingSingleActionAgent
+
+import os
+import sys
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from concurrent_executor import ConcurrentAgentExecutor, LLMMultiActionAgent, MultiActionOutputParser
 
 llmInstance = OpenAI(temperature=0, verbose=True)
 customPromptInstance = prompt_template.CustomPromptInstance
@@ -38,8 +45,18 @@ print(customTools, toolNames)
 # 生成代理
 agent = LLMSingleActionAgent(llm_chain=llmChainInstance, output_parser=customOutputParserInstance, stop=["\nObservation:"], allowed_tools=toolNames)
 
+# 流式规划：识别出完整的 Action / Action Input 后立即取消剩余的生成并开始执行工具
+# agent = StreamingSingleActionAgent(llm_chain=llmChainInstance, output_parser=customOutputParserInstance, stop=["\nObservation:"], allowed_tools=toolNames)
+
 # 执行代理
 with get_openai_callback() as cb:
     agent_executor = AgentExecutor.from_agent_and_tools(agent=agent, tools=customTools, verbose=True)
     agent_executor.run("深圳今天的天气怎么样?")
-    print(cb)
\ No newline at end of file
+    print(cb)
+
+# 并发执行工具：模型一步给出多个互不依赖的动作，在线程池中同时执行（最多 4 个，每个最多 30 秒），观察结果按动作的顺序合并
+# multiActionAgent = LLMMultiActionAgent(llm_chain=LLMChain(llm=llmInstance, prompt=prompt_template.CustomMultiActionPromptInstance), output_parser=MultiActionOutputParser(), stop=["\nObservation:"], allowed_tools=toolNames)
+# with get_openai_callback() as cb:
+#     agent_executor = ConcurrentAgentExecutor.from_agent_and_tools(agent=multiActionAgent, tools=customTools, max_concurrency=4, tool_timeout=30, verbose=True)
+#     agent_executor.run("深圳和北京今天的天气怎么样?")
+#     print(cb)
\ No newline at end of file
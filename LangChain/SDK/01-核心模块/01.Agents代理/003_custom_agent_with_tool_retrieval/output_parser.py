@@ -1,9 +1,21 @@
 from langchain.agents import AgentOutputParser
 from langchain.schema import AgentAction, AgentFinish
 
-from typing import Union
+from typing import List, Optional, Union
 import re
 
+# 一个 Action / Action Input；Action Input 可以有多行，到下一个 Observation / Thought / Action / Final Answer 标记或输出末尾为止。
+# CustomOutputParser、StreamingOutputParser 和 MultiActionOutputParser（../concurrent_executor.py）共用
+ACTION_REGEX = re.compile(
+    r"Action\s*\d*\s*:[ \t]*([^\n]*?)[ \t]*\nAction\s*\d*\s*Input\s*\d*\s*:\s*(.*?)"
+    r"(?=\n[ \t]*(?:Observation|Thought|Final Answer|Action\s*\d*(?:\s*Input\s*\d*)?)\s*:|\Z)",
+    re.DOTALL,
+)
+
+
+def parse_action(match: "re.Match[str]", log: str) -> AgentAction:
+    return AgentAction(tool=match.group(1).strip(), tool_input=match.group(2).strip().strip('"'), log=log)
+
 
 # 自定义输出解析器
 class CustomOutputParser(AgentOutputParser):
@@ -20,19 +32,74 @@ class CustomOutputParser(AgentOutputParser):
             )
 
         # 解析出动作和动作输入
-        regex = r"Action\s*\d*\s*:(.*?)\nAction\s*\d*\s*Input\s*\d*\s*:[\s]*(.*)"
-        match = re.search(regex, llm_output, re.DOTALL)
+        match = ACTION_REGEX.search(llm_output)
         if not match:
             raise ValueError(f"Could not parse LLM output: `{llm_output}`")
 
-        action = match.group(1).strip()
-        action_input = match.group(2)
+        action = parse_action(match, llm_output)
 
-        print("CustomOutputParser ->", action, action_input, llm_output)
+        print("CustomOutputParser ->", action.tool, action.tool_input, llm_output)
         # CustomOutputParser -> Search Shenzhen weather Thought: I need to find out the current weather in Shenzhen
 
         # 返回动作和动作输入
-        return AgentAction(tool=action, tool_input=action_input.strip(" ").strip('"'), log=llm_output)
+        return action
+
+
+# 增量输出解析器
+#   parse 要等模型生成完整的输出后才能解析，工具要等到生成结束才开始执行。
+#   这里逐块接收流式输出，出现完整的 Action / Action Input 后立即给出 AgentAction（done 为 True），调用方可以停止读取、取消剩余的生成。
+#   与 parse 使用同一个 ACTION_REGEX，多行的 Action Input 在流式和非流式下解析结果相同。Action Input 到以下位置结束：
+#     1. 下一个标记：模型没有停在 Observation 之前，而是继续生成（例如 "\nThought:"、"\nObservation:"）；
+#     2. stop 序列：模型或供应商不处理 stop 时，stop 序列会出现在输出中，从这里截断；
+#     3. 流结束：代理的 stop=["\nObservation:"] 交给供应商处理时，stop 序列不会被发送，Action Input 之后流直接结束，
+#        这时由 finish 调用 parse 解析（包括解析失败的报错）。
+#   出现 "Final Answer:" 后不再查找动作，最终答案是剩余的全部输出，只能读到生成结束。
+#   标记以冒号结尾，只在收到换行、冒号或 stop 序列时才用正则查找动作，每个 token 的开销很小。
+class StreamingOutputParser:
+    def __init__(self, parser: CustomOutputParser, stop: Optional[List[str]] = None):
+        self.parser = parser
+        self.stop = [s for s in stop or [] if s]
+        self.text = ""
+        self.chunks = 0
+        self.done = False
+        self.stopped_early = False  # 在流结束之前识别出了动作
+        self.action: Optional[AgentAction] = None
+        self._final = False
+
+    def _cut_at_stop(self, start: int) -> bool:
+        # 只在新收到的文本附近查找 stop 序列
+        positions = [i for i in (self.text.find(s, start) for s in self.stop) if i != -1]
+        if not positions:
+            return False
+        self.text = self.text[:min(positions)]
+        return True
+
+    def feed(self, chunk: str) -> Optional[AgentAction]:
+        if self.done:
+            return None
+        start = max(0, len(self.text) - max((len(s) for s in self.stop), default=0))
+        self.text += chunk
+        self.chunks += 1
+        stopped = self._cut_at_stop(start)
+        if stopped:
+            self.done = True
+        if self._final or not (stopped or "\n" in chunk or ":" in chunk):
+            return None
+        if "Final Answer:" in self.text:
+            self._final = True
+            return None
+        match = ACTION_REGEX.search(self.text)
+        # Action Input 不为空，并且后面已经出现下一个标记（匹配没有到达文本末尾）或 stop 序列
+        if not match or not match.group(2).strip() or not (stopped or match.end() < len(self.text)):
+            return None
+        self.done = self.stopped_early = True
+        self.action = parse_action(match, self.text[:match.end()])
+        return self.action
+
+    def finish(self) -> Union[AgentAction, AgentFinish]:
+        if self.action is not None:
+            return self.action
+        return self.parser.parse(self.text)
 
 
 CustomOutputParserInstance = CustomOutputParser()
\ No newline at end of file
@@ -1,5 +1,12 @@
 from langchain.prompts import StringPromptTemplate
-from typing import Callable
+from langchain.pydantic_v1 import Field
+from collections import OrderedDict
+from functools import lru_cache
+from typing import Any, Callable, List, Optional, Tuple
+
+import threading
+
+import tiktoken
 
 import tool_retriever
 
@@ -24,11 +31,128 @@ Begin! Remember to speak as a pirate when giving your final answer. Use lots of
 Question: {input}
 {agent_scratchpad}"""
 
+# 一步可以给出多个互不依赖的动作，配合 ConcurrentAgentExecutor（../concurrent_executor.py）并发执行
+multi_action_template = template.replace("""Action: the action to take, should be one of [{tool_names}]
+Action Input: the input to the action
+""", """Action 1: the action to take, should be one of [{tool_names}]
+Action 1 Input: the input to the action
+Action 2: another action that does not depend on the result of Action 1 (optional, add as many as needed)
+Action 2 Input: the input to the action
+""")
+
+
+@lru_cache(maxsize=None)
+def get_encoding(model_name: str) -> tiktoken.Encoding:
+    try:
+        return tiktoken.encoding_for_model(model_name)
+    except KeyError:
+        return tiktoken.get_encoding("cl100k_base")
+
+
+# 用 tiktoken 计数（默认模型与 OpenAI() 一致），只在设置了 max_tokens 时使用
+def count_tokens(text: str, model_name: str = "text-davinci-003") -> int:
+    return len(get_encoding(model_name).encode(text))
+
+
+# 工具块按工具集合缓存：同一组工具只渲染一次
+@lru_cache(maxsize=256)
+def render_tools(tools: Tuple[Tuple[str, str], ...]) -> Tuple[str, str]:
+    return "\n".join([f"{name}: {description}" for name, description in tools]), ", ".join([name for name, _ in tools])
+
+
+# 增量构建 agent_scratchpad
+#   原来每一步都遍历全部 intermediate_steps 重新拼接，步数越多越慢（总开销与步数的平方成正比）。
+#   这里记住上一次已经渲染的步骤：AgentExecutor 在同一次运行中只会在列表末尾追加新的 (AgentAction, Observation)，
+#   因此只需要渲染新增的步骤并追加到已有的字符串后面；输入变化或步骤列表不是上一次的延续时从头重建。
+#   设置 max_tokens 后，总长度超出预算时从最早的步骤开始把观察结果替换为占位文本（保留 Thought/Action），
+#   长时间运行的代理不会超出上下文窗口。
+class ScratchpadBuilder:
+    TRUNCATED = "[earlier observation omitted]"
+
+    def __init__(self, max_tokens: Optional[int] = None, token_counter: Callable[[str], int] = count_tokens):
+        self.max_tokens = max_tokens
+        self.token_counter = token_counter
+        self.reset(None)
+
+    def reset(self, input: Optional[str]) -> None:
+        self._input = input
+        self._steps: List[Any] = []  # 已渲染的 (AgentAction, Observation)
+        self._parts: List[Tuple[str, str]] = []  # 每一步的 (action.log, 观察结果部分)
+        self._tokens: List[int] = []  # 每一步完整渲染的 token 数
+        self._trimmed = 0  # 已经省略观察结果的步骤数
+        self._total = 0
+        self._text = ""
+
+    def _is_continuation(self, input: str, intermediate_steps: List[Any]) -> bool:
+        n = len(self._steps)
+        return input == self._input and len(intermediate_steps) >= n and (n == 0 or intermediate_steps[n - 1] is self._steps[-1])
+
+    def build(self, input: str, intermediate_steps: List[Any]) -> str:
+        if not self._is_continuation(input, intermediate_steps):
+            self.reset(input)
+        for step in intermediate_steps[len(self._steps):]:
+            action, observation = step
+            part = (action.log, f"\nObservation: {observation}\nThought: ")
+            self._steps.append(step)
+            self._parts.append(part)
+            # 不限制长度时不需要计数
+            self._tokens.append(self.token_counter(part[0] + part[1]) if self.max_tokens is not None else 0)
+            self._total += self._tokens[-1]
+            self._text += part[0] + part[1]
+        if self.max_tokens is not None and self._total > self.max_tokens:
+            self._trim()
+        return self._text
+
+    def _trim(self) -> None:
+        placeholder = f"\nObservation: {self.TRUNCATED}\nThought: "
+        trimmed = self._trimmed
+        # 最新的一步始终保留完整的观察结果
+        while self._total > self.max_tokens and self._trimmed < len(self._parts) - 1:
+            i = self._trimmed
+            trimmed_tokens = self.token_counter(self._parts[i][0] + placeholder)
+            self._total -= self._tokens[i] - trimmed_tokens
+            self._tokens[i] = trimmed_tokens
+            self._parts[i] = (self._parts[i][0], placeholder)
+            self._trimmed += 1
+        # 只有省略了新的观察结果时才重新拼接
+        if self._trimmed != trimmed:
+            self._text = "".join(log + observation for log, observation in self._parts)
+
+
+# 按代理的运行分别保存 ScratchpadBuilder
+#   提示模板是模块级别的单例，多个代理交替或并发运行时共用同一个模板，不能共用一个 ScratchpadBuilder。
+#   同一次运行的步骤列表只在末尾追加，第一步的 (AgentAction, Observation) 对象在整个运行中不变，
+#   因此以它作为运行的键（同时持有该对象，id 不会被复用）；没有步骤时 agent_scratchpad 为空，不需要状态。
+#   最多保留 max_runs 个运行，最久未使用的先丢弃；访问都在锁内完成，多线程运行也是安全的。
+class ScratchpadStore:
+    def __init__(self, max_tokens: Optional[int] = None, token_counter: Callable[[str], int] = count_tokens, max_runs: int = 128):
+        self.max_tokens = max_tokens
+        self.token_counter = token_counter
+        self.max_runs = max_runs
+        self._runs: "OrderedDict[int, Tuple[Any, ScratchpadBuilder]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def build(self, input: str, intermediate_steps: List[Any]) -> str:
+        if not intermediate_steps:
+            return ""
+        first = intermediate_steps[0]
+        with self._lock:
+            entry = self._runs.get(id(first))
+            if entry is None or entry[0] is not first:
+                entry = (first, ScratchpadBuilder(self.max_tokens, self.token_counter))
+                self._runs[id(first)] = entry
+                if len(self._runs) > self.max_runs:
+                    self._runs.popitem(last=False)
+            else:
+                self._runs.move_to_end(id(first))
+            return entry[1].build(input, intermediate_steps)
+
 
 # 设置提示模板
 class CustomPromptTemplate(StringPromptTemplate):
     template: str  # 使用的模板
     tools_getter: Callable  # 可用工具列表
+    scratchpads: ScratchpadStore = Field(default_factory=lambda: ScratchpadStore(max_tokens=None))  # 按运行增量构建的 agent_scratchpad
 
     def format(self, **kwargs) -> str:
 
@@ -47,21 +171,15 @@ class CustomPromptTemplate(StringPromptTemplate):
 
         # 获取中间步骤（AgentAction，Observation元组）
         # 以特定方式格式化它们
+        # 只渲染新增的步骤
         intermediate_steps = kwargs.pop("intermediate_steps")
-        thoughts = ""
-        for action, observation in intermediate_steps:
-            thoughts += action.log
-            thoughts += f"\nObservation: {observation}\nThought: "
 
         # 将agent_scratchpad变量设置为该值
-        kwargs["agent_scratchpad"] = thoughts
+        kwargs["agent_scratchpad"] = self.scratchpads.build(kwargs["input"], intermediate_steps)
         tools = self.tools_getter(kwargs["input"])
 
-        # 从提供的工具列表创建一个工具变量
-        kwargs["tools"] = "\n".join([f"{tool.name}: {tool.description}" for tool in tools])
-
-        # 为提供的工具创建一个工具名称列表
-        kwargs["tool_names"] = ", ".join([tool.name for tool in tools])
+        # 从提供的工具列表创建一个工具变量，并为提供的工具创建一个工具名称列表（同一组工具只渲染一次）
+        kwargs["tools"], kwargs["tool_names"] = render_tools(tuple((tool.name, tool.description) for tool in tools))
 
         template = self.template.format(**kwargs)
 
@@ -70,4 +188,8 @@ class CustomPromptTemplate(StringPromptTemplate):
 
 # 这省略了`agent_scratchpad`，`tools`和`tool_names`变量，因为这些变量是动态生成的
 # 这包括`intermediate_steps`变量，因为这是必需的
-CustomPromptInstance = CustomPromptTemplate(template=template, tools_getter=tool_retriever.get_tools, input_variables=["input", "intermediate_steps"])
+# max_tokens 限制 agent_scratchpad 的长度，超出时省略最早的观察结果
+CustomPromptInstance = CustomPromptTemplate(template=template, tools_getter=tool_retriever.get_tools, input_variables=["input", "intermediate_steps"], scratchpads=ScratchpadStore(max_tokens=2000))
+
+# 多动作版本，与 MultiActionOutputParser、LLMMultiActionAgent 一起使用
+CustomMultiActionPromptInstance = CustomPromptTemplate(template=multi_action_template, tools_getter=tool_retriever.get_tools, input_variables=["input", "intermediate_steps"], scratchpads=ScratchpadStore(max_tokens=2000))
@@ -0,0 +1,113 @@
+from langchain.agents import LLMSingleActionAgent
+from langchain.callbacks.manager import AsyncCallbackManager, CallbackManager, Callbacks
+from langchain.llms.base import BaseLLM
+from langchain.load.dump import dumpd
+from langchain.schema import AgentAction, AgentFinish, LLMResult
+from langchain.schema.output import GenerationChunk
+
+from typing import Any, Dict, List, Optional, Tuple, Union
+
+from output_parser import StreamingOutputParser
+
+
+# 流式规划的代理
+#   LLMSingleActionAgent.plan 通过 llm_chain.run 等待完整的生成结果，再交给输出解析器。
+#   这里仍然以 llm_chain 的一次运行进行（链的回调和 verbose 输出不变），但模型的输出用 llm._stream 逐块读取，
+#   交给 StreamingOutputParser（output_parser.py）：
+#     1. stop 序列照常交给供应商，正常情况下 Action Input 之后流就结束了；
+#     2. 模型没有停下（例如跳过 Observation 继续生成）时，识别出完整的 Action / Action Input 后立即关闭流，取消剩余的生成；
+#     3. 不通过 llm.stream 读取：中途关闭 llm.stream 会被当作 LLM 出错（on_llm_error），这里自己管理 LLM 的运行，
+#        提前停止时用已经收到的输出调用 on_llm_end，流式 token 统计（StreamingTokenUsage.py）等回调照常工作。
+#   模型不支持流式输出（没有实现 _stream）时与 LLMSingleActionAgent 相同。
+class StreamingSingleActionAgent(LLMSingleActionAgent):
+
+    def _streams(self) -> bool:
+        llm = self.llm_chain.llm
+        return isinstance(llm, BaseLLM) and type(llm)._stream is not BaseLLM._stream
+
+    def _inputs(self, intermediate_steps: List[Tuple[AgentAction, str]], kwargs: Dict[str, Any]) -> Dict[str, Any]:
+        return {"intermediate_steps": intermediate_steps, "stop": self.stop, **kwargs}
+
+    def _chain_manager(self, callbacks: Callbacks, manager_cls: Any) -> Any:
+        chain = self.llm_chain
+        return manager_cls.configure(callbacks, chain.callbacks, chain.verbose, None, chain.tags, None, chain.metadata)
+
+    def _llm_manager(self, chain_run: Any, manager_cls: Any) -> Any:
+        llm = self.llm_chain.llm
+        return manager_cls.configure(chain_run.get_child(), llm.callbacks, llm.verbose, None, llm.tags, None, llm.metadata)
+
+    def plan(
+        self,
+        intermediate_steps: List[Tuple[AgentAction, str]],
+        callbacks: Callbacks = None,
+        **kwargs: Any,
+    ) -> Union[AgentAction, AgentFinish]:
+        if not self._streams():
+            return super().plan(intermediate_steps, callbacks=callbacks, **kwargs)
+        llm = self.llm_chain.llm
+        inputs = self._inputs(intermediate_steps, kwargs)
+        chain_run = self._chain_manager(callbacks, CallbackManager).on_chain_start(dumpd(self.llm_chain), inputs)
+        try:
+            prompts, stop = self.llm_chain.prep_prompts([inputs], run_manager=chain_run)
+            prompt = prompts[0].to_string()
+            (llm_run,) = self._llm_manager(chain_run, CallbackManager).on_llm_start(dumpd(llm), [prompt], invocation_params={**llm.dict(), "stop": stop}, options={"stop": stop})
+            parser = StreamingOutputParser(self.output_parser, stop)
+            generation: Optional[GenerationChunk] = None
+            chunks = llm._stream(prompt, stop=stop, run_manager=llm_run)
+            try:
+                for chunk in chunks:
+                    generation = chunk if generation is None else generation + chunk
+                    parser.feed(chunk.text)
+                    if parser.done:
+                        # OpenAI 等实现在 yield 之后才调用 on_llm_new_token，提前停止时补上最后一块
+                        llm_run.on_llm_new_token(chunk.text, chunk=chunk)
+                        break
+            except BaseException as e:
+                llm_run.on_llm_error(e)
+                raise
+            finally:
+                # 提前停止时关闭供应商的流，取消剩余的生成
+                chunks.close()
+            llm_run.on_llm_end(LLMResult(generations=[[generation or GenerationChunk(text="")]]))
+        except BaseException as e:
+            chain_run.on_chain_error(e)
+            raise
+        chain_run.on_chain_end({self.llm_chain.output_key: parser.text})
+        return parser.finish()
+
+    async def aplan(
+        self,
+        intermediate_steps: List[Tuple[AgentAction, str]],
+        callbacks: Callbacks = None,
+        **kwargs: Any,
+    ) -> Union[AgentAction, AgentFinish]:
+        if not self._streams() or type(self.llm_chain.llm)._astream is BaseLLM._astream:
+            return await super().aplan(intermediate_steps, callbacks=callbacks, **kwargs)
+        llm = self.llm_chain.llm
+        inputs = self._inputs(intermediate_steps, kwargs)
+        chain_run = await self._chain_manager(callbacks, AsyncCallbackManager).on_chain_start(dumpd(self.llm_chain), inputs)
+        try:
+            prompts, stop = await self.llm_chain.aprep_prompts([inputs], run_manager=chain_run)
+            prompt = prompts[0].to_string()
+            (llm_run,) = await self._llm_manager(chain_run, AsyncCallbackManager).on_llm_start(dumpd(llm), [prompt], invocation_params={**llm.dict(), "stop": stop}, options={"stop": stop})
+            parser = StreamingOutputParser(self.output_parser, stop)
+            generation: Optional[GenerationChunk] = None
+            chunks = llm._astream(prompt, stop=stop, run_manager=llm_run)
+            try:
+                async for chunk in chunks:
+                    generation = chunk if generation is None else generation + chunk
+                    parser.feed(chunk.text)
+                    if parser.done:
+                        await llm_run.on_llm_new_token(chunk.text, chunk=chunk)
+                        break
+            except BaseException as e:
+                await llm_run.on_llm_error(e)
+                raise
+            finally:
+                await chunks.aclose()
+            await llm_run.on_llm_end(LLMResult(generations=[[generation or GenerationChunk(text="")]]))
+        except BaseException as e:
+            await chain_run.on_chain_error(e)
+            raise
+        await chain_run.on_chain_end({self.llm_chain.output_key: parser.text})
+        return parser.finish()
@@ -0,0 +1,226 @@
+# 工具注册表(tool-registry)
+#   tool_retriever.py 原来在 import 时就嵌入全部 100 个工具描述、建立 FAISS 索引并做一次测试搜索，
+#   每个代理进程在处理请求之前都要先付出这些网络和 CPU 开销。
+#   ToolRegistry 把工具描述的索引保存到磁盘：
+#     1. 索引以「嵌入模型 + 全部工具的名称和描述」的哈希为键，工具集合不变时直接加载，不调用嵌入模型；
+#     2. 第一次 get_tools 时才加载（惰性），FAISS 索引文件用 mmap 映射，不把向量整体读入内存；
+#     3. 工具集合变化时，只嵌入新增或描述变化的工具，其余工具的向量从旧索引中取回（只对精确的 flat 索引这样做，
+#        PQ/SQ 等有损索引取回的只是近似向量，全部重新嵌入），然后重建并保存索引；
+#     4. 清单匹配但索引文件丢失或损坏时重新建立索引。
+#   嵌入模型由 namespace 区分，默认取嵌入的 model 属性；PersistentCacheEmbeddings 等包装类会先取出被包装的嵌入，
+#   更换模型后旧索引（维度可能不同）不会被加载。
+#   路由结果按规范化后的查询（去掉首尾空白、合并连续空白、转小写）缓存在 LRU 中，嵌入和检索仍使用原始查询：
+#   CustomPromptTemplate.format 在代理的每一步都会调用 get_tools(input)，同一次运行中 input 不变，
+#   10 步的代理运行只做一次嵌入和检索；prewarm 可以为已知的查询集合批量预先计算路由结果。
+
+import hashlib
+import json
+import os
+import sys
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from langchain.docstore.in_memory import InMemoryDocstore
+from langchain.embeddings.base import Embeddings
+from langchain.schema import Document
+from langchain.vectorstores.faiss import dependable_faiss_import
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..", "..", "..", "Document", "02-Retrieval", "4.Vector stores"))
+from FaissIndex import IndexedFAISS, create_index
+from BatchSearch import similarity_search_batch
+
+MANIFEST_FILE = "manifest.json"
+
+
+def description_hash(tool: Any) -> str:
+    return hashlib.sha256(f"{tool.name}\n{tool.description}".encode("utf-8")).hexdigest()
+
+
+def normalize_query(query: str) -> str:
+    return " ".join(query.split()).lower()
+
+
+def embedding_namespace(embeddings: Embeddings) -> str:
+    # CacheBackedEmbeddings 等包装类没有 model 属性，取出被包装的嵌入
+    while hasattr(embeddings, "underlying_embeddings"):
+        embeddings = embeddings.underlying_embeddings
+    return getattr(embeddings, "model", None) or type(embeddings).__name__
+
+
+class ToolRegistry:
+    def __init__(
+        self,
+        tools: Sequence[Any],
+        embeddings: Embeddings,
+        index_dir: str = "./.tool_index",
+        index_type: str = "flat",
+        k: int = 4,
+        cache_size: int = 1024,
+        namespace: Optional[str] = None,
+    ):
+        self.tools = list(tools)
+        self.embeddings = embeddings
+        self._namespace = namespace
+        self.index_dir = index_dir
+        self.index_type = index_type
+        self.k = k
+        self.cache_size = cache_size
+        self.stats = {"loaded": 0, "embedded": 0, "reused": 0, "hits": 0, "misses": 0}
+        self._vector_store: Optional[IndexedFAISS] = None
+        self._lock = threading.Lock()
+        # (规范化的查询, k) -> 工具下标
+        self._routes: "OrderedDict[Tuple[str, int], List[int]]" = OrderedDict()
+        self._routes_lock = threading.Lock()
+
+    @property
+    def namespace(self) -> str:
+        return self._namespace or embedding_namespace(self.embeddings)
+
+    # 工具集合的哈希：嵌入模型变化也会使索引失效
+    @property
+    def tool_set_hash(self) -> str:
+        digest = hashlib.sha256(self.namespace.encode("utf-8"))
+        for tool in self.tools:
+            digest.update(description_hash(tool).encode("ascii"))
+        return digest.hexdigest()
+
+    @property
+    def vector_store(self) -> IndexedFAISS:
+        if self._vector_store is None:
+            with self._lock:
+                if self._vector_store is None:
+                    self._vector_store = self._load()
+        return self._vector_store
+
+    def _read_manifest(self) -> Dict[str, Any]:
+        path = os.path.join(self.index_dir, MANIFEST_FILE)
+        if os.path.exists(path):
+            with open(path) as f:
+                return json.load(f)
+        return {}
+
+    def _read_index(self, file_name: str) -> Any:
+        faiss = dependable_faiss_import()
+        path = os.path.join(self.index_dir, file_name)
+        try:
+            # 向量通过 mmap 映射，由操作系统按需换入
+            return faiss.read_index(path, getattr(faiss, "IO_FLAG_MMAP_IFC", faiss.IO_FLAG_MMAP))
+        except RuntimeError:
+            # 不支持 mmap 的索引类型按普通方式读取
+            return faiss.read_index(path)
+
+    def _index_exists(self, manifest: Dict[str, Any]) -> bool:
+        return "index_file" in manifest and os.path.exists(os.path.join(self.index_dir, manifest["index_file"]))
+
+    def _reusable_index(self, manifest: Dict[str, Any]) -> Any:
+        # 只有同一个嵌入模型的精确（flat）索引可以原样取回向量
+        if manifest.get("namespace") != self.namespace or not self._index_exists(manifest):
+            return None
+        faiss = dependable_faiss_import()
+        try:
+            index = self._read_index(manifest["index_file"])
+        except RuntimeError:
+            return None
+        return index if isinstance(faiss.downcast_index(index), faiss.IndexFlat) else None
+
+    def _build(self, manifest: Dict[str, Any]) -> Any:
+        # 旧索引中描述没有变化的工具直接取回向量，只嵌入新增或变化的工具；嵌入模型变化或旧索引有损时全部重新嵌入
+        old_index = self._reusable_index(manifest)
+        old_rows: Dict[str, int] = {h: i for i, h in enumerate(manifest["tools"])} if old_index is not None else {}
+        hashes = [description_hash(t) for t in self.tools]
+        missing = [i for i, h in enumerate(hashes) if h not in old_rows]
+        new_vectors = self.embeddings.embed_documents([self.tools[i].description for i in missing]) if missing else []
+        vectors: List[Any] = [None] * len(self.tools)
+        for i, vector in zip(missing, new_vectors):
+            vectors[i] = vector
+        for i, h in enumerate(hashes):
+            if h in old_rows:
+                vectors[i] = old_index.reconstruct(old_rows[h])
+        self.stats["embedded"] += len(missing)
+        self.stats["reused"] += len(self.tools) - len(missing)
+
+        matrix = np.array(vectors, dtype=np.float32)
+        index = create_index(matrix, self.index_type)
+        index.add(matrix)
+        # 先写索引文件再写清单，清单永远指向完整的索引
+        os.makedirs(self.index_dir, exist_ok=True)
+        file_name = f"tools-{self.tool_set_hash[:16]}.faiss"
+        dependable_faiss_import().write_index(index, os.path.join(self.index_dir, file_name))
+        tmp = os.path.join(self.index_dir, MANIFEST_FILE + ".tmp")
+        with open(tmp, "w") as f:
+            json.dump({"hash": self.tool_set_hash, "namespace": self.namespace, "index_file": file_name, "tools": hashes}, f)
+        os.replace(tmp, os.path.join(self.index_dir, MANIFEST_FILE))
+        if manifest.get("index_file") not in (None, file_name) and self._index_exists(manifest):
+            os.remove(os.path.join(self.index_dir, manifest["index_file"]))
+        return self._read_index(file_name)
+
+    def _load(self) -> IndexedFAISS:
+        manifest = self._read_manifest()
+        index = None
+        if manifest.get("hash") == self.tool_set_hash and self._index_exists(manifest):
+            try:
+                index = self._read_index(manifest["index_file"])
+                self.stats["loaded"] += 1
+            except RuntimeError:
+                # 索引文件损坏，重新建立
+                index = None
+        if index is None:
+            index = self._build(manifest)
+        # 文档只保存工具下标，不需要嵌入
+        docs = {str(i): Document(page_content=t.description, metadata={"index": i}) for i, t in enumerate(self.tools)}
+        return IndexedFAISS(self.embeddings.embed_query, index, InMemoryDocstore(docs), {i: str(i) for i in range(len(self.tools))})
+
+    def _cached(self, key: Tuple[str, int]) -> Optional[List[int]]:
+        with self._routes_lock:
+            route = self._routes.get(key)
+            if route is None:
+                self.stats["misses"] += 1
+                return None
+            self._routes.move_to_end(key)
+            self.stats["hits"] += 1
+            return route
+
+    def _store(self, key: Tuple[str, int], route: List[int]) -> None:
+        with self._routes_lock:
+            self._routes[key] = route
+            self._routes.move_to_end(key)
+            while len(self._routes) > self.cache_size:
+                self._routes.popitem(last=False)
+
+    def get_tools(self, query: str, k: Optional[int] = None) -> List[Any]:
+        key = (normalize_query(query), k or self.k)
+        route = self._cached(key)
+        if route is None:
+            # 规范化只用于缓存键，嵌入的是原始查询
+            docs = self.vector_store.similarity_search(query, k=key[1])
+            route = [d.metadata["index"] for d in docs]
+            self._store(key, route)
+        return [self.tools[i] for i in route]
+
+    def get_tools_batch(self, queries: Iterable[str], k: Optional[int] = None) -> List[List[Any]]:
+        """Route many queries at once: cache misses are embedded like get_tools and searched in one pass."""
+        k = k or self.k
+        queries = list(queries)
+        keys = [(normalize_query(q), k) for q in queries]
+        # 每个缓存键取第一个对应的原始查询
+        originals = dict(zip(reversed(keys), reversed(queries)))
+        routes = {key: self._cached(key) for key in dict.fromkeys(keys)}
+        missing = [key for key, route in routes.items() if route is None]
+        if missing:
+            # 与 get_tools 一样用 embed_query：查询不会被 PersistentCacheEmbeddings 等文档缓存持久化
+            vectors = [self.embeddings.embed_query(originals[key]) for key in missing]
+            for key, docs in zip(missing, similarity_search_batch(self.vector_store, vectors, k=k)):
+                routes[key] = [d.metadata["index"] for d in docs]
+                self._store(key, routes[key])
+        return [[self.tools[i] for i in routes[key]] for key in keys]
+
+    def prewarm(self, queries: Iterable[str], k: Optional[int] = None) -> None:
+        """Precompute and cache the routes of a known query set."""
+        self.get_tools_batch(queries, k)
+
+    def clear_cache(self) -> None:
+        with self._routes_lock:
+            self._routes.clear()
@@ -3,14 +3,19 @@
 #   然后，对于传入的查询，我们可以为该查询创建嵌入，并进行相关工具的相似性搜索。
 
 import tools
+import os
+import sys
 
 # 设置环境
-from langchain.vectorstores import FAISS
 from langchain.embeddings import OpenAIEmbeddings
-from langchain.schema import Document
 
-docs = [Document(page_content=t.description, metadata={"index": i}) for i, t in enumerate(tools.ALL_TOOLS)]
+# 使用持久化的嵌入缓存，重复运行时不再重新嵌入工具描述
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..", "..", "..", "Document", "02-Retrieval", "3.Text embedding models"))
+from CachedEmbeddings import PersistentCacheEmbeddings
 
+from tool_registry import ToolRegistry
+
+# 每个工具描述对应一个文档，文档的 metadata 记录工具下标
 # [
 #     Document(page_content='useful for when you need to answer questions about current events', metadata={'index': 0}),
 #     Document(page_content='a silly function that you can use to get more information about the number 0', metadata={'index': 1}),
@@ -18,22 +23,36 @@ docs = [Document(page_content=t.description, metadata={"index": i}) for i, t in
 #     ......
 # ]
 
-vector_store = FAISS.from_documents(docs, OpenAIEmbeddings())
-retriever = vector_store.as_retriever()
-
-# 测试搜索前十个和输入查询最相关的内容
-top10SimilarityVal = vector_store.search(query="whats the weather?", search_type="similarity", k=10)
-print("Top 10 Similarity Value ->", top10SimilarityVal)
+# 工具描述的索引保存在 .tool_index 目录中，第一次 get_tools 时才加载；工具集合变化时只嵌入新增或变化的工具。
+# 100 个工具用精确的 flat 索引即可；上万个工具时可以用 index_type="hnsw" 或 index_type="ivf_flat"，
+# 召回率与延迟的取舍可以运行 Document/02-Retrieval/4.Vector stores/FaissIndex.py 比较
+# 缓存和索引都放在本文件所在的目录中，与运行时的当前目录无关
+directory = os.path.dirname(os.path.abspath(__file__))
+embeddings = PersistentCacheEmbeddings(OpenAIEmbeddings(), database_path=os.path.join(directory, ".embeddings.db"))
+registry = ToolRegistry(tools.ALL_TOOLS, embeddings, index_dir=os.path.join(directory, ".tool_index"), index_type="flat")
 
 
-# 根据传递的查询获取最相关的工具
+# 根据传递的查询获取最相关的工具；结果按规范化的查询缓存，代理每一步用相同的 input 调用时不再重新嵌入和检索
 def get_tools(query):
-    docs = retriever.get_relevant_documents(query)
-    return [tools.ALL_TOOLS[d.metadata["index"]] for d in docs]
+    return registry.get_tools(query)
+
+
+# 批量路由：未命中缓存的查询一次嵌入、一次搜索，返回每个查询的相关工具
+def get_tools_batch(queries, k=4):
+    return registry.get_tools_batch(queries, k=k)
+
+
+# 为已知的查询集合预先计算路由结果
+def prewarm(queries):
+    registry.prewarm(queries)
 
 
 # 测试
 if __name__ == '__main__':
+    # 测试搜索前十个和输入查询最相关的内容
+    top10SimilarityVal = registry.vector_store.search(query="whats the weather?", search_type="similarity", k=10)
+    print("Top 10 Similarity Value ->", top10SimilarityVal)
+
     print(get_tools("whats the weather?"), "\n")
 
     # [
@@ -44,3 +63,9 @@ if __name__ == '__main__':
     # ]
 
     print(get_tools("whats the number 13?"), "\n")
+
+    print(get_tools_batch(["whats the weather?", "whats the number 13?"]), "\n")
+
+    prewarm(["whats the weather?", "whats the number 13?", "whats the number 42?"])
+    get_tools("  Whats the number 42? ")
+    print(registry.stats)  # 规范化后命中缓存
@@ -0,0 +1,278 @@
+import asyncio
+import os
+import sys
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, wait
+from typing import Any, Callable, Dict, List, Optional, Tuple, Union
+
+from langchain.agents import AgentExecutor, AgentOutputParser, BaseMultiActionAgent
+from langchain.agents.agent import ExceptionTool
+from langchain.agents.tools import InvalidTool
+from langchain.callbacks.manager import AsyncCallbackManagerForChainRun, CallbackManagerForChainRun, Callbacks
+from langchain.chains import LLMChain
+from langchain.schema import AgentAction, AgentFinish, OutputParserException
+from langchain.tools import BaseTool
+
+# Action / Action Input 的正则和解析规则与 CustomOutputParser 共用
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "003_custom_agent_with_tool_retrieval"))
+from output_parser import ACTION_REGEX, parse_action
+
+# 并发执行多个工具（ConcurrentAgentExecutor）
+#   getting_started.py、custom_agents.py 和 003_custom_agent_with_tool_retrieval/index.py 中的代理每一步只调用一个工具，
+#   例如 generate_llm_reply 先用 serpapi 搜索，下一步才用 llm-math 计算，每个工具的网络等待依次累加。
+#   这里让模型在一步中给出多个互不依赖的动作（Action 1 / Action 1 Input、Action 2 / Action 2 Input ……）：
+#     1. MultiActionOutputParser 解析出全部动作，LLMMultiActionAgent 是返回多个动作的 LLMSingleActionAgent；
+#     2. ConcurrentAgentExecutor 为每个动作启动一个线程同时执行，最多 max_concurrency 个同时运行；
+#     3. 每个工具从开始运行起计时，超过 tool_timeout（或 tool_timeouts 中为该工具单独设置的值）后，
+#        观察结果记为超时，并让出并发名额，模型可以在下一步改用其它方式；
+#        超时是放弃工具而不是取消：Python 无法强行终止线程，超时的工具在后台继续运行，结果被丢弃。
+#        工具运行在守护线程中，卡住的工具不会阻止进程退出（退出时直接结束，工具的 finally 等清理代码不会执行）；
+#     4. 观察结果按动作的顺序合并回 intermediate_steps，与完成的先后无关，提示词和结果都是确定的。
+#   异步调用（arun）用 asyncio.Semaphore 限制并发、asyncio.wait_for 限制超时；超时后立即释放信号量。
+#   wait_for 只能取消协程：没有协程实现的工具由 tool.arun 放到事件循环默认的线程池中运行，超时后同样被放弃，
+#   并且 asyncio.run 结束时会等待它运行完，需要可靠超时的工具应该实现 coroutine。
+#   只有一个动作或 max_concurrency=1 时在当前线程中直接执行，与 AgentExecutor 相同。
+
+MULTI_ACTION_FORMAT_INSTRUCTIONS = """Use the following format:
+
+Question: the input question you must answer
+Thought: you should always think about what to do
+Action 1: the action to take, should be one of [{tool_names}]
+Action 1 Input: the input to the action
+Action 2: another action that does not depend on the result of Action 1 (optional, add as many as needed)
+Action 2 Input: the input to the action
+Observation: the result of each action
+... (this Thought/Action/Action Input/Observation can repeat N times)
+Thought: I now know the final answer
+Final Answer: the final answer to the original input question"""
+
+
+
+# 解析一步中的多个动作
+class MultiActionOutputParser(AgentOutputParser):
+
+    def parse(self, text: str) -> Union[List[AgentAction], AgentFinish]:
+        if "Final Answer:" in text:
+            return AgentFinish(return_values={"output": text.split("Final Answer:")[-1].strip()}, log=text)
+        matches = list(ACTION_REGEX.finditer(text))
+        if not matches:
+            raise OutputParserException(f"Could not parse LLM output: `{text}`")
+        # 每个动作的 log 只包含它自己的 Action / Action Input，第一个动作带上前面的 Thought，拼接 scratchpad 时不会重复
+        actions = []
+        start = 0
+        for match in matches:
+            actions.append(parse_action(match, text[start:match.end()].lstrip("\n")))
+            start = match.end()
+        return actions
+
+    @property
+    def _type(self) -> str:
+        return "multi_action"
+
+
+# 返回多个动作的 LLM 代理
+#   提示词有 agent_scratchpad 变量时（例如 ZeroShotAgent.create_prompt 创建的提示）由代理拼接，
+#   否则把 intermediate_steps 交给提示模板处理（例如 CustomPromptTemplate）。
+class LLMMultiActionAgent(BaseMultiActionAgent):
+    llm_chain: LLMChain
+    output_parser: AgentOutputParser
+    stop: List[str]
+    allowed_tools: Optional[List[str]] = None
+    observation_prefix: str = "Observation: "
+    llm_prefix: str = "Thought: "
+
+    @property
+    def input_keys(self) -> List[str]:
+        return list(set(self.llm_chain.input_keys) - {"intermediate_steps", "agent_scratchpad"})
+
+    def get_allowed_tools(self) -> Optional[List[str]]:
+        return self.allowed_tools
+
+    def _inputs(self, intermediate_steps: List[Tuple[AgentAction, str]], kwargs: Dict[str, Any]) -> Dict[str, Any]:
+        if "agent_scratchpad" not in self.llm_chain.prompt.input_variables:
+            return {"intermediate_steps": intermediate_steps, **kwargs}
+        scratchpad = "".join(f"{action.log}\n{self.observation_prefix}{observation}\n{self.llm_prefix}" for action, observation in intermediate_steps)
+        return {"agent_scratchpad": scratchpad, **kwargs}
+
+    def plan(self, intermediate_steps: List[Tuple[AgentAction, str]], callbacks: Callbacks = None, **kwargs: Any) -> Union[List[AgentAction], AgentFinish]:
+        output = self.llm_chain.run(stop=self.stop, callbacks=callbacks, **self._inputs(intermediate_steps, kwargs))
+        return self.output_parser.parse(output)
+
+    async def aplan(self, intermediate_steps: List[Tuple[AgentAction, str]], callbacks: Callbacks = None, **kwargs: Any) -> Union[List[AgentAction], AgentFinish]:
+        output = await self.llm_chain.arun(stop=self.stop, callbacks=callbacks, **self._inputs(intermediate_steps, kwargs))
+        return self.output_parser.parse(output)
+
+
+class ConcurrentAgentExecutor(AgentExecutor):
+    max_concurrency: int = 4  # 同时运行的工具数上限
+    tool_timeout: Optional[float] = None  # 每个工具的超时秒数，None 表示不限制
+    tool_timeouts: Dict[str, float] = {}  # 按工具名称单独设置的超时秒数
+
+    def _timeout(self, tool: str) -> Optional[float]:
+        return self.tool_timeouts.get(tool, self.tool_timeout)
+
+    def _timeout_observation(self, action: AgentAction) -> str:
+        return f"{action.tool} timed out after {self._timeout(action.tool)} seconds"
+
+    def _parsing_error_step(self, e: OutputParserException) -> AgentAction:
+        # 与 AgentExecutor 处理 handle_parsing_errors 的规则相同
+        if self.handle_parsing_errors is False:
+            raise e
+        text = str(e)
+        if self.handle_parsing_errors is True:
+            observation = str(e.observation) if e.send_to_llm else "Invalid or incomplete response"
+            text = str(e.llm_output) if e.send_to_llm else text
+        elif isinstance(self.handle_parsing_errors, str):
+            observation = self.handle_parsing_errors
+        elif callable(self.handle_parsing_errors):
+            observation = self.handle_parsing_errors(e)
+        else:
+            raise ValueError("Got unexpected type of `handle_parsing_errors`")
+        return AgentAction("_Exception", observation, text)
+
+    def _tool_call(self, name_to_tool_map: Dict[str, BaseTool], color_mapping: Dict[str, str], action: AgentAction, callbacks: Callbacks) -> Tuple[BaseTool, Any, Dict[str, Any]]:
+        # 返回要调用的工具、工具输入和 run/arun 的参数
+        tool_run_kwargs = self.agent.tool_run_logging_kwargs()
+        if action.tool not in name_to_tool_map:
+            tool_input = {"requested_tool_name": action.tool, "available_tool_names": list(name_to_tool_map.keys())}
+            return InvalidTool(), tool_input, {"verbose": self.verbose, "color": None, "callbacks": callbacks, **tool_run_kwargs}
+        tool = name_to_tool_map[action.tool]
+        if tool.return_direct:
+            tool_run_kwargs["llm_prefix"] = ""
+        return tool, action.tool_input, {"verbose": self.verbose, "color": color_mapping[action.tool], "callbacks": callbacks, **tool_run_kwargs}
+
+    def _run_concurrently(self, calls: List[Callable[[], str]], timeouts: List[Optional[float]], on_timeout: List[str]) -> List[str]:
+        n = len(calls)
+        limit = min(self.max_concurrency, n)
+        futures: List["Future[str]"] = [Future() for _ in range(n)]
+        started: List[float] = [0.0] * n
+
+        def run(i: int) -> None:
+            futures[i].set_running_or_notify_cancel()
+            try:
+                futures[i].set_result(calls[i]())
+            except BaseException as e:
+                futures[i].set_exception(e)
+
+        results: List[Optional[str]] = [None] * n
+        queued = 0
+        running = set()
+        while queued < n or running:
+            # 有空闲名额时启动下一个工具
+            while queued < n and len(running) < limit:
+                started[queued] = time.monotonic()
+                threading.Thread(target=run, args=(queued,), name=f"tool-{queued}", daemon=True).start()
+                running.add(queued)
+                queued += 1
+            now = time.monotonic()
+            for i in sorted(running):
+                if futures[i].done():
+                    results[i] = futures[i].result()
+                    running.discard(i)
+                elif timeouts[i] is not None and now - started[i] >= timeouts[i]:
+                    # 放弃超时的工具，让出名额
+                    results[i] = on_timeout[i]
+                    running.discard(i)
+            if not running or (queued < n and len(running) < limit):
+                continue
+            # 等到下一个工具完成或下一个超时时刻
+            deadlines = [started[i] + timeouts[i] - now for i in running if timeouts[i] is not None]
+            wait([futures[i] for i in running], timeout=max(0.0, min(deadlines)) if deadlines else None, return_when=FIRST_COMPLETED)
+        return results
+
+    def _take_next_step(
+        self,
+        name_to_tool_map: Dict[str, BaseTool],
+        color_mapping: Dict[str, str],
+        inputs: Dict[str, str],
+        intermediate_steps: List[Tuple[AgentAction, str]],
+        run_manager: Optional[CallbackManagerForChainRun] = None,
+    ) -> Union[AgentFinish, List[Tuple[AgentAction, str]]]:
+        callbacks = run_manager.get_child() if run_manager else None
+        try:
+            output = self.agent.plan(self._prepare_intermediate_steps(intermediate_steps), callbacks=callbacks, **inputs)
+        except OutputParserException as e:
+            action = self._parsing_error_step(e)
+            if run_manager:
+                run_manager.on_agent_action(action, color="green")
+            observation = ExceptionTool().run(action.tool_input, verbose=self.verbose, color=None, callbacks=callbacks, **self.agent.tool_run_logging_kwargs())
+            return [(action, observation)]
+        if isinstance(output, AgentFinish):
+            return output
+        actions = [output] if isinstance(output, AgentAction) else output
+        calls, timeouts = [], []
+        for action in actions:
+            if run_manager:
+                run_manager.on_agent_action(action, color="green")
+            tool, tool_input, kwargs = self._tool_call(name_to_tool_map, color_mapping, action, callbacks)
+            calls.append(lambda tool=tool, tool_input=tool_input, kwargs=kwargs: tool.run(tool_input, **kwargs))
+            timeouts.append(self._timeout(action.tool))
+        if all(t is None for t in timeouts) and (len(actions) == 1 or self.max_concurrency <= 1):
+            observations = [call() for call in calls]
+        else:
+            observations = self._run_concurrently(calls, timeouts, [self._timeout_observation(a) for a in actions])
+        return list(zip(actions, observations))
+
+    async def _atake_next_step(
+        self,
+        name_to_tool_map: Dict[str, BaseTool],
+        color_mapping: Dict[str, str],
+        inputs: Dict[str, str],
+        intermediate_steps: List[Tuple[AgentAction, str]],
+        run_manager: Optional[AsyncCallbackManagerForChainRun] = None,
+    ) -> Union[AgentFinish, List[Tuple[AgentAction, str]]]:
+        callbacks = run_manager.get_child() if run_manager else None
+        try:
+            output = await self.agent.aplan(self._prepare_intermediate_steps(intermediate_steps), callbacks=callbacks, **inputs)
+        except OutputParserException as e:
+            action = self._parsing_error_step(e)
+            if run_manager:
+                await run_manager.on_agent_action(action, color="green")
+            observation = await ExceptionTool().arun(action.tool_input, verbose=self.verbose, color=None, callbacks=callbacks, **self.agent.tool_run_logging_kwargs())
+            return [(action, observation)]
+        if isinstance(output, AgentFinish):
+            return output
+        actions = [output] if isinstance(output, AgentAction) else output
+        semaphore = asyncio.Semaphore(self.max_concurrency)
+
+        async def perform(action: AgentAction) -> str:
+            if run_manager:
+                await run_manager.on_agent_action(action, verbose=self.verbose, color="green")
+            tool, tool_input, kwargs = self._tool_call(name_to_tool_map, color_mapping, action, callbacks)
+            # 超时从取得信号量、工具开始运行时计算
+            async with semaphore:
+                try:
+                    return await asyncio.wait_for(tool.arun(tool_input, **kwargs), self._timeout(action.tool))
+                except asyncio.TimeoutError:
+                    return self._timeout_observation(action)
+
+        # gather 按动作顺序返回结果
+        observations = await asyncio.gather(*[perform(action) for action in actions])
+        return list(zip(actions, observations))
+
+
+if __name__ == "__main__":
+    from langchain.agents import Tool, ZeroShotAgent
+    from langchain.llms.fake import FakeListLLM
+
+    # 离线对比：模型一步给出 3 个互不依赖的搜索，每次搜索模拟 0.5 秒的网络等待；第三个工具卡住，由 tool_timeouts 限制为 1 秒
+    def slow(seconds: float) -> Callable[[str], str]:
+        def search(query: str) -> str:
+            time.sleep(seconds)
+            return f"result of {query}"
+        return search
+
+    tools = [Tool(name="Search", func=slow(0.5), description="search the web"), Tool(name="Wiki", func=slow(0.5), description="search wikipedia"), Tool(name="Slow", func=slow(5), description="a slow api")]
+    responses = [
+        "Thought: I need three lookups\nAction 1: Search\nAction 1 Input: Xi'an population\nAction 2: Wiki\nAction 2 Input: Xi'an\nAction 3: Slow\nAction 3 Input: Xi'an",
+        "Thought: I now know the final answer\nFinal Answer: done",
+    ]
+    prompt = ZeroShotAgent.create_prompt(tools, format_instructions=MULTI_ACTION_FORMAT_INSTRUCTIONS)
+
+    for executor_class, kwargs in ((AgentExecutor, {}), (ConcurrentAgentExecutor, {"max_concurrency": 4, "tool_timeouts": {"Slow": 1.0}})):
+        agent = LLMMultiActionAgent(llm_chain=LLMChain(llm=FakeListLLM(responses=responses), prompt=prompt), output_parser=MultiActionOutputParser(), stop=["\nObservation:"])
+        executor = executor_class.from_agent_and_tools(agent=agent, tools=tools, return_intermediate_steps=True, **kwargs)
+        start = time.perf_counter()
+        result = executor({"input": "Tell me about Xi'an"})
+        print(f"{executor_class.__name__}: {time.perf_counter() - start:.2f}s", [observation for _, observation in result["intermediate_steps"]])
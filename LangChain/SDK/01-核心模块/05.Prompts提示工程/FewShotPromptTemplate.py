@@ -4,6 +4,13 @@ from langchain.prompts.example_selector import SemanticSimilarityExampleSelector
 from langchain.vectorstores import Chroma
 from langchain.embeddings import OpenAIEmbeddings
 
+import os
+import sys
+
+# 使用持久化的嵌入缓存，重复运行时不再重新嵌入相同的示例
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..", "..", "Document", "02-Retrieval", "3.Text embedding models"))
+from CachedEmbeddings import PersistentCacheEmbeddings
+
 # 示例数据
 examples = [{
     "question":
@@ -62,7 +69,7 @@ examples = [{
 example_prompt = PromptTemplate(input_variables=["question", "answer"], template="Question: {question}\n{answer}")
 prompt1 = FewShotPromptTemplate(examples=examples, example_prompt=example_prompt, suffix="Question: {input}", input_variables=["input"])
 
-example_selector = SemanticSimilarityExampleSelector.from_examples(examples, OpenAIEmbeddings(), Chroma, k=1)
+example_selector = SemanticSimilarityExampleSelector.from_examples(examples, PersistentCacheEmbeddings(OpenAIEmbeddings(), database_path="./.embeddings.db"), Chroma, k=1)
 
 # question = "Who was the father of Mary Ball Washington?"
 # selected_examples = example_selector.select_examples({"question": question})
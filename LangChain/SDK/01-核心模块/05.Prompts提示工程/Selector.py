@@ -7,6 +7,19 @@ from langchain.embeddings import OpenAIEmbeddings
 
 from typing import Dict, List
 import numpy as np
+import os
+import sys
+
+# 使用持久化的嵌入缓存，重复运行时不再重新嵌入相同的示例
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..", "..", "Document", "02-Retrieval", "3.Text embedding models"))
+from CachedEmbeddings import PersistentCacheEmbeddings
+
+# 可配置索引类型的 FAISS（IVF、PQ、HNSW、标量量化）
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..", "..", "Document", "02-Retrieval", "4.Vector stores"))
+from FaissIndex import IndexedFAISS
+from MMR import max_marginal_relevance_search_batch
+
+embeddings = PersistentCacheEmbeddings(OpenAIEmbeddings(), database_path="./.embeddings.db")
 
 # 自定义选择器
 def CustomExampleSelectorDemo():
@@ -95,7 +108,7 @@ def MaxMarginalRelevanceExampleSelectorDemo():
     
     example_selector = MaxMarginalRelevanceExampleSelector.from_examples(
         examples,
-        OpenAIEmbeddings(), # 这是用于生成嵌入的嵌入类，这些嵌入用于测量语义相似性。
+        embeddings, # 这是用于生成嵌入的嵌入类，这些嵌入用于测量语义相似性。
         FAISS, # 这是用于存储嵌入并对其进行相似性搜索的VectorStore类。
         k=2,
     )
@@ -112,7 +125,7 @@ def MaxMarginalRelevanceExampleSelectorDemo():
     # 让我们将其与仅通过相似性获得的内容进行比较，方法是使用SemanticSimilarityExampleSelector而不是MaxMarginalRelevanceExampleSelector。
     example_selector = SemanticSimilarityExampleSelector.from_examples(
         examples,
-        OpenAIEmbeddings(),
+        embeddings,
         FAISS,
         k=2,
     )
@@ -125,6 +138,24 @@ def MaxMarginalRelevanceExampleSelectorDemo():
     )
     print(similar_prompt.format(adjective="worried"))
 
+    # 示例很多时，可以用 IndexedFAISS 代替 FAISS 选择索引类型，多出的参数会传给 from_texts。
+    # 例如 HNSW 图索引：检索时间不再随示例数线性增长，ef_search 越大召回率越高、越慢；示例太少无法训练的索引会自动退回 flat。
+    # IndexedFAISS 的 MMR 重排是向量化的，候选向量直接从索引中取回，fetch_k 很大（上千）时也很快。
+    example_selector = MaxMarginalRelevanceExampleSelector.from_examples(
+        examples,
+        embeddings,
+        IndexedFAISS,
+        k=2,
+        index_type="hnsw",
+        ef_search=64,
+    )
+    print(example_selector.select_examples({"adjective": "worried"}))
+
+    # 批量 MMR：多个输入一次嵌入、一次检索、一次重排
+    adjectives = ["worried", "big", "fast"]
+    for docs in max_marginal_relevance_search_batch(example_selector.vectorstore, embeddings.embed_documents(adjectives), k=2, fetch_k=6):
+        print([doc.metadata for doc in docs])
+
 
 # NGramOverlapExampleSelector Demo 按 n-gram 重叠选择示例
 # 此示例选择器根据 n-gram 重叠选择要使用的示例。
@@ -184,7 +215,7 @@ def SemanticSimilarityExampleSelectorDemo():
     
     example_selector = SemanticSimilarityExampleSelector.from_examples(
         examples,
-        OpenAIEmbeddings(),
+        embeddings,
         Chroma,
         k=1
     )